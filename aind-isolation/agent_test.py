@@ -3,12 +3,39 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import gc
+import json
+import os
+import pickle
+import random
+import tempfile
+import time
 import unittest
 
 import isolation
+import competition_agent
+import endgame
 import game_agent
+import opening_book
+import replay
+import sample_players
+import search_trace
+import time_manager
+import tournament
+import transposition
+import tune
 
+from isolation.symmetry import board_symmetry
+
+from functools import partial
 from importlib import reload
+from itertools import product
+from unittest.mock import patch
+
+try:
+    import learned_eval  # requires NumPy, unlike the agents
+except ImportError:
+    learned_eval = None
 
 
 class IsolationTest(unittest.TestCase):
@@ -21,5 +48,598 @@ class IsolationTest(unittest.TestCase):
         self.game = isolation.Board(self.player1, self.player2)
 
 
+class BitBoardTest(unittest.TestCase):
+    """Check that BitBoard reproduces the rules implemented by Board"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def test_random_games_match_board(self):
+        rng = random.Random(0)
+        for width, height in [(7, 7), (5, 9), (9, 5), (15, 15)]:
+            for _ in range(10):
+                board = isolation.Board(self.player1, self.player2, width, height)
+                bitboard = isolation.BitBoard(self.player1, self.player2, width, height)
+                while True:
+                    for player in (self.player1, self.player2):
+                        self.assertEqual(sorted(board.get_legal_moves(player)),
+                                         sorted(bitboard.get_legal_moves(player)))
+                        self.assertEqual(board.get_player_location(player),
+                                         bitboard.get_player_location(player))
+                        self.assertEqual(board.utility(player),
+                                         bitboard.utility(player))
+                    self.assertEqual(board.to_string(), bitboard.to_string())
+                    self.assertEqual(board.hash(), bitboard.hash())
+                    moves = sorted(board.get_legal_moves())
+                    if not moves:
+                        break
+                    move = rng.choice(moves)
+                    board.apply_move(move)
+                    bitboard = bitboard.forecast_move(move)
+
+
+class PushPopTest(unittest.TestCase):
+    """Check that pop_move() exactly reverts push_move()"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def test_push_pop_restores_state(self):
+        rng = random.Random(1)
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            game = board_cls(self.player1, self.player2)
+            history = []
+            while game.get_legal_moves():
+                history.append((game.to_string(), game.hash(), game.move_count,
+                                game.active_player))
+                game.push_move(rng.choice(sorted(game.get_legal_moves())))
+            while history:
+                game.pop_move()
+                self.assertEqual((game.to_string(), game.hash(), game.move_count,
+                                  game.active_player), history.pop())
+
+    def test_in_place_search_matches_copy_search(self):
+        for in_place in (False, True):
+            random.seed(2)
+            player = game_agent.MinimaxPlayer(search_depth=3, in_place=in_place)
+            game = isolation.Board(player, self.player2)
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            before = game.to_string()
+            move = player.get_move(game, lambda: 1000.)
+            self.assertEqual(game.to_string(), before)
+            if not in_place:
+                expected = move
+        self.assertEqual(move, expected)
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """Check that alpha-beta search with a transposition table returns the
+    minimax value of the game"""
+
+    def test_alphabeta_value_matches_minimax(self):
+        rng = random.Random(3)
+        for _ in range(5):
+            minimax = game_agent.MinimaxPlayer()
+            alphabeta = game_agent.AlphaBetaPlayer()
+            minimax.time_left = alphabeta.time_left = lambda: float("inf")
+            game = isolation.Board(alphabeta, "Player2")
+            for _ in range(rng.randint(2, 12)):
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            if game.active_player != alphabeta:
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            if not game.get_legal_moves():
+                continue
+
+            # score the minimax tree from the perspective of the alphabeta player
+            minimax.score = lambda state, _: game_agent.custom_score(state, alphabeta)
+            expected = max(minimax.min_value(game.forecast_move(move), 2)
+                           for move in game.get_legal_moves())
+            alphabeta.tt.clear()
+            alphabeta.alphabeta(game, 3)
+            _, value, flag, _ = alphabeta.tt.probe(game.hash())
+            self.assertEqual(flag, game_agent.EXACT)
+            self.assertEqual(value, expected)
+
+
+    def test_memory_budget(self):
+        player = game_agent.AlphaBetaPlayer(tt_megabytes=1)
+        self.assertEqual(player.tt.size, 2**20 // transposition.ENTRY_BYTES)
+        self.assertGreater(player.tt.size,
+                           game_agent.AlphaBetaPlayer(tt_megabytes=0.1).tt.size)
+
+
+class SearchModeTest(unittest.TestCase):
+    """Check that principal variation search and aspiration windows return
+    the value of plain alpha-beta search"""
+
+    def test_search_modes_match_alphabeta(self):
+        rng = random.Random(5)
+        configs = [("alphabeta", 0.), ("pvs", 0.), ("alphabeta", 0.5), ("pvs", 0.5)]
+        for _ in range(10):
+            # an even number of moves leaves the searching player to move
+            moves = []
+            num_moves = 2 * rng.randint(1, 8)
+            game = isolation.Board("Player1", "Player2")
+            while len(moves) < num_moves and game.get_legal_moves():
+                moves.append(rng.choice(sorted(game.get_legal_moves())))
+                game.apply_move(moves[-1])
+            if len(moves) % 2 or not game.get_legal_moves():
+                continue
+
+            values = []
+            for mode, window in configs:
+                player = game_agent.AlphaBetaPlayer(
+                    score_fn=game_agent.custom_score_2, tt_size=0,
+                    search_mode=mode, aspiration_window=window)
+                player.time_left = lambda: float("inf")
+                game = isolation.Board(player, "Player2")
+                for move in moves:
+                    game.apply_move(move)
+                for depth in range(1, 5):
+                    if window and player.root_value is not None:
+                        player.best_move = player.aspiration_search(game, depth)
+                    else:
+                        player.best_move = player.alphabeta(game, depth)
+                values.append(player.root_value)
+            self.assertEqual(len(set(values)), 1, values)
+
+    def test_fail_low_timeout_keeps_previous_best_move(self):
+        game = isolation.Board("Player1", "Player2")
+        game.apply_move((2, 3))
+        game.apply_move((4, 4))
+        for previous_best in game.get_legal_moves():
+            player = game_agent.AlphaBetaPlayer(
+                tt_size=0, aspiration_window=0.5, time_management=False)
+            game = isolation.Board(player, "Player2")
+            game.apply_move((2, 3))
+            game.apply_move((4, 4))
+            failed_low = []
+            search_root = player.search_root
+
+            def first_iteration(game, depth):
+                # a window far above every value makes the next iteration fail low
+                player.root_value = 1e6
+                return previous_best
+
+            def aspiration_pass(game, depth, alpha, beta):
+                best_move, value = search_root(game, depth, alpha, beta)
+                failed_low.append(value <= alpha)
+                return best_move, value
+
+            # the time runs out as soon as the re-search after the fail-low starts
+            time_left = lambda: 0 if failed_low else 1000
+            with patch.object(player, "alphabeta", first_iteration), \
+                    patch.object(player, "search_root", aspiration_pass):
+                self.assertEqual(player.get_move(game, time_left), previous_best)
+            self.assertEqual(failed_low, [True])
+
+
+class PonderTest(unittest.TestCase):
+    """Check that pondering fills the transposition table between moves"""
+
+    def test_ponder_search_fills_table(self):
+        random.seed(1)
+        player = game_agent.AlphaBetaPlayer(ponder=True)
+        game = isolation.Board(player, "Player2")
+        game.apply_move((2, 3))
+        game.apply_move((4, 4))
+        clock = [500]
+
+        def time_left():
+            clock[0] -= 1
+            return clock[0]
+
+        move = player.get_move(game, time_left)
+        game.apply_move(move)
+        time.sleep(0.1)
+        player.stop_pondering()
+        self.assertIsNone(player._ponder_thread)
+        self.assertGreater(player.stats.depth, 0)
+
+        # the reply positions were searched, and the table survives the next move
+        reply = game.get_legal_moves()[0]
+        state = game.forecast_move(reply)
+        self.assertIsNotNone(player.tt.probe(state.hash()))
+        clock[0] = 500
+        self.assertIn(player.get_move(state, time_left), state.get_legal_moves())
+        player.stop_pondering()
+
+    def test_pondering_ends_without_get_move(self):
+        player = game_agent.AlphaBetaPlayer(ponder=True)
+        game = isolation.Board(player, "Player2", width=3, height=3)
+        game.apply_move((0, 0))
+        game.apply_move((1, 1))
+        # the opponent at the center of a 3x3 board has no move left
+        player.start_pondering(game, (1, 2))
+        self.assertIsNone(player._ponder_thread)
+
+        game = isolation.Board(player, "Player2")
+        game.apply_move((2, 3))
+        game.apply_move((4, 4))
+        with patch.object(game_agent, "PONDER_TIMEOUT", 0.05):
+            player.start_pondering(game, (0, 2))
+            player._ponder_thread.join(5.)
+        self.assertFalse(player._ponder_thread.is_alive())
+        player.stop_pondering()
+
+
+class SearchTraceTest(unittest.TestCase):
+    """Check the per-move search trace of Board.play()"""
+
+    def test_trace_records_every_move(self):
+        random.seed(2)
+        player1 = game_agent.AlphaBetaPlayer(timeout=5.)
+        player2 = sample_players.GreedyPlayer()
+        game = isolation.Board(player1, player2)
+        path = os.path.join(tempfile.mkdtemp(), "trace.jsonl")
+        trace = search_trace.TraceWriter(path, {player1: "AB"}, game_id=1)
+        _, history, _ = game.play(time_limit=30, trace=trace)
+
+        records = search_trace.read_trace(path)
+        self.assertEqual([r["move_count"] for r in records], list(range(len(records))))
+        self.assertGreaterEqual(len(records), len(history))
+        agents = {r["agent"] for r in records}
+        self.assertEqual(agents, {"AB", "GreedyPlayer"})
+        for record in records:
+            if record["agent"] == "AB":
+                self.assertIn("tt_hit_rate", record)
+                self.assertAlmostEqual(record["margin_ms"], record["time_left_ms"] - 5.)
+
+        summary = search_trace.summarize(records)
+        self.assertEqual(sum(row["moves"] for row in summary.values()), len(records))
+        self.assertTrue(all(phase in search_trace.PHASES for _, phase in summary))
+
+
+class ReplayTest(unittest.TestCase):
+    """Check that replay stores round-trip tournament games"""
+
+    def test_store_round_trip_and_summary(self):
+        rng = random.Random(2)
+        games = []
+        for seed in range(20):
+            player1 = sample_players.RandomPlayer()
+            player2 = sample_players.RandomPlayer()
+            opening = rng.sample([(r, c) for r in range(7) for c in range(7)], 2)
+            spec = tournament.GameSpec(player1, player2, opening, seed,
+                                       ("Random1", "Random2"), None)
+            winner, termination, history = tournament.play_game(spec)
+            self.assertEqual(history[:2], [list(move) for move in opening])
+            games.append((history, winner, termination))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = replay.ReplayWriter(tmp)
+            for history, winner, termination in games:
+                writer.add(history, ("Random1", "Random2"), winner, termination)
+            records = replay.read_index(tmp)
+            self.assertEqual([replay.load_moves(tmp, record) for record in records],
+                             [history for history, _, _ in games])
+            self.assertEqual(replay.ReplayWriter(tmp).count, len(games))
+
+        summary = replay.summarize(records)
+        self.assertEqual(sum(games for games, _ in summary["length"].values()), 20)
+        self.assertEqual(sum(wins for _, wins in summary["opening"].values()),
+                         sum(winner == 0 for _, winner, _ in games))
+
+        # boards of more than 255 cells use two bytes per move
+        moves = [[15, 16], [0, 0], [13, 15]]
+        data = replay.encode_moves(moves, 17, 17)
+        self.assertEqual(len(data), 6)
+        self.assertEqual(replay.decode_moves(data, 17, 17), moves)
+
+
+class TimeManagerTest(unittest.TestCase):
+    """Check the iteration cost predictions of the time manager"""
+
+    def test_skips_iterations_that_cannot_finish(self):
+        clock = [150.]
+        manager = time_manager.TimeManager()
+        manager.start(lambda: clock[0], 10.)
+
+        # 10ms iterations growing threefold leave time for the next one...
+        clock[0] -= 10
+        self.assertTrue(manager.next_iteration((1, 1), [10]))
+        clock[0] -= 30
+        self.assertTrue(manager.next_iteration((1, 1), [10, 30]))
+        self.assertAlmostEqual(manager.predicted, 90.)
+
+        # ...until the prediction no longer fits in the time left
+        clock[0] -= 90
+        self.assertFalse(manager.next_iteration((1, 1), [10, 30, 90]))
+        self.assertTrue(manager.skipped)
+
+    def test_extends_search_when_best_move_changes(self):
+        for best_move, expected in [((1, 1), False), ((2, 3), True)]:
+            clock = [150.]
+            manager = time_manager.TimeManager()
+            manager.start(lambda: clock[0], 10.)
+            clock[0] -= 20
+            manager.next_iteration((1, 1), [10])
+            clock[0] -= 60
+            self.assertEqual(manager.next_iteration(best_move, [10, 40]), expected)
+
+
+class SymmetryTest(unittest.TestCase):
+    """Check that symmetric game states share their canonical key"""
+
+    def test_symmetric_states_share_canonical_key(self):
+        rng = random.Random(7)
+        for width, height in [(7, 7), (5, 6)]:
+            symmetry = board_symmetry(width, height)
+            for _ in range(10):
+                game = isolation.Board("Player1", "Player2", width, height)
+                history = []
+                for _ in range(rng.randint(0, 9)):
+                    moves = sorted(game.get_legal_moves())
+                    if not moves:
+                        break
+                    history.append(rng.choice(moves))
+                    game.apply_move(history[-1])
+
+                self.assertEqual(symmetry.keys(game)[0], game.hash())
+                key, transform = symmetry.canonical(game)
+                for t in symmetry.transforms:
+                    variant = isolation.BitBoard("Player1", "Player2", width, height)
+                    for move in history:
+                        variant.apply_move(t(*move))
+                    self.assertEqual(symmetry.canonical(variant)[0], key)
+
+                for move in game.get_legal_moves():
+                    canonical_move = symmetry.to_canonical(move, transform)
+                    self.assertEqual(symmetry.from_canonical(canonical_move, transform), move)
+
+    def test_canonical_keys_preserve_alphabeta_value(self):
+        rng = random.Random(5)
+        for _ in range(5):
+            history = []
+            game = isolation.Board("Player1", "Player2")
+            for _ in range(2 * rng.randint(1, 4)):
+                history.append(rng.choice(sorted(game.get_legal_moves())))
+                game.apply_move(history[-1])
+            if not game.get_legal_moves():
+                continue
+
+            values = []
+            for symmetry_plies in (0, 100):
+                player = game_agent.AlphaBetaPlayer(symmetry_plies=symmetry_plies)
+                player.time_left = lambda: float("inf")
+                state = isolation.Board(player, "Player2")
+                for move in history:
+                    state.apply_move(move)
+                values.append(player.search_root(state, 3)[1])
+            self.assertEqual(values[0], values[1])
+
+
+class BatchScoringTest(unittest.TestCase):
+    """Check that batched leaf scores match the heuristics"""
+
+    def test_batch_scores_match_heuristics(self):
+        rng = random.Random(3)
+        heuristics = [game_agent.custom_score, game_agent.custom_score_2,
+                      game_agent.custom_score_3, sample_players.improved_score,
+                      partial(game_agent.custom_score_2, weight=0.5),
+                      partial(game_agent.custom_score_3, weight=0.2)]
+        geometries = [(7, 7), (5, 9), (8, 6)]
+        for board_cls, (width, height) in product(
+                (isolation.Board, isolation.BitBoard), geometries):
+            for _ in range(15):
+                game = board_cls("Player1", "Player2", width, height)
+                for _ in range(rng.randint(2, 40)):
+                    if not game.get_legal_moves():
+                        break
+                    game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+                moves = game.get_legal_moves()
+                for score_fn in heuristics:
+                    for player in ("Player1", "Player2"):
+                        expected = [score_fn(game.forecast_move(move), player)
+                                    for move in moves]
+                        self.assertEqual(game_agent.score_batch(
+                            game, moves, player, score_fn), expected)
+
+    def test_search_batches_partial_heuristics(self):
+        score_fn = partial(game_agent.custom_score_2, weight=0.5)
+        player = game_agent.AlphaBetaPlayer(score_fn=score_fn)
+        game = isolation.Board(player, "Player2")
+        game.apply_move((2, 3))
+        game.apply_move((4, 4))
+        moves = game.get_legal_moves()
+        expected = [score_fn(game.forecast_move(move), player) for move in moves]
+        self.assertEqual(player.leaf_scores(game, moves), expected)
+        self.assertIsNone(game_agent.AlphaBetaPlayer(
+            score_fn=score_fn, batch_scoring=False).leaf_scores(game, moves))
+
+
+class TuneTest(unittest.TestCase):
+    """Check the sequential probability ratio test of the tuning harness"""
+
+    def test_log_likelihood_ratio_crosses_bounds(self):
+        lower, upper = tune.sprt_bounds(0.05, 0.05)
+        self.assertAlmostEqual(lower, -upper)
+        self.assertEqual(tune.log_likelihood_ratio(0, 0), 0.)
+        self.assertGreater(tune.log_likelihood_ratio(340, 260, 0, 50), upper)
+        self.assertLess(tune.log_likelihood_ratio(300, 300, 0, 50), lower)
+        self.assertAlmostEqual(tune.elo_difference(tune.expected_score(35)), 35)
+
+    def test_sprt_records_outcome(self):
+        test = tune.Agent(sample_players.GreedyPlayer(), "Greedy")
+        base = tune.Agent(sample_players.RandomPlayer(), "Random")
+        outcome = tune.sprt(test, base, max_games=6, seed=1)
+        self.assertEqual(outcome["games"], 6)
+        self.assertEqual(outcome["wins"] + outcome["losses"], 6)
+        self.assertEqual(outcome["result"], "inconclusive")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.jsonl")
+            tune.record(path, outcome)
+            tune.record(path, outcome)
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["wins"], outcome["wins"])
+        with self.assertRaises(ValueError):
+            tune.sprt(test, base, max_games=0)
+
+
+class BoardGeometryTest(unittest.TestCase):
+    """Check that the agents play on non-square and large boards"""
+
+    def test_agents_play_legal_moves(self):
+        for width, height in [(5, 9), (9, 5), (15, 15)]:
+            player1 = game_agent.AlphaBetaPlayer(score_fn=game_agent.custom_score_3)
+            player2 = game_agent.AlphaBetaPlayer()
+            game = isolation.BitBoard(player1, player2, width, height)
+            for _ in range(6):
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                start = time.time()
+                move = game.active_player.get_move(
+                    game, lambda: 100. - 1000 * (time.time() - start))
+                self.assertIn(move, moves)
+                game.apply_move(move)
+
+
+@unittest.skipUnless(learned_eval, "learned_eval requires NumPy")
+class LearnedEvalTest(unittest.TestCase):
+    """Check the self-play pipeline and the learned evaluators"""
+
+    def test_self_play_labels_both_players(self):
+        rows, outcomes, move_counts = learned_eval.self_play((0, 25, 7, 7))
+        self.assertEqual(rows.shape, (len(outcomes), len(learned_eval.FEATURES)))
+        self.assertEqual(len(move_counts), len(outcomes))
+        # every position is stored once from each player's point of view
+        self.assertTrue(((outcomes[0::2] + outcomes[1::2]) == 1).all())
+        self.assertTrue(((rows[0::2, 7] + rows[1::2, 7]) == 1).all())
+
+    def test_batch_scores_match_evaluator(self):
+        rows, outcomes, _ = learned_eval.self_play((1, 25, 7, 7))
+        evaluators = [learned_eval.fit_linear(rows, outcomes),
+                      learned_eval.fit_mlp(rows, outcomes, epochs=2)]
+        rng = random.Random(4)
+        for evaluator in evaluators:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "model.json")
+                evaluator.save(path)
+                loaded = learned_eval.load_evaluator(path)
+            for _ in range(20):
+                game = isolation.BitBoard("Player1", "Player2")
+                for _ in range(rng.randint(2, 30)):
+                    if not game.get_legal_moves():
+                        break
+                    game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+                moves = game.get_legal_moves()
+                for player in ("Player1", "Player2"):
+                    expected = [evaluator(game.forecast_move(move), player)
+                                for move in moves]
+                    scores = game_agent.score_batch(game, moves, player, loaded)
+                    for score, value in zip(scores, expected):
+                        self.assertAlmostEqual(score, value)
+
+    def test_released_evaluator_is_unregistered(self):
+        rows, outcomes, _ = learned_eval.self_play((2, 25, 7, 7))
+        evaluator = pickle.loads(pickle.dumps(learned_eval.fit_linear(rows, outcomes)))
+        self.assertIn(evaluator, game_agent.BATCH_SCORES)
+        registered = len(game_agent.BATCH_SCORES)
+        del evaluator
+        gc.collect()
+        self.assertEqual(len(game_agent.BATCH_SCORES), registered - 1)
+
+
+class EndgameTest(unittest.TestCase):
+    """Check the separated endgame solver against exhaustive search"""
+
+    def negamax(self, game):
+        moves = game.get_legal_moves()
+        if not moves:
+            return -1
+        return max(-self.negamax(game.forecast_move(move)) for move in moves)
+
+    def test_solver_matches_exhaustive_search(self):
+        rng = random.Random(4)
+        solved = 0
+        while solved < 20:
+            game = isolation.Board("Player1", "Player2")
+            while game.get_legal_moves():
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+                value = endgame.solve(game, game.active_player)
+                if value is not None and len(game.get_blank_spaces()) <= 18:
+                    self.assertEqual(value > 0, self.negamax(game) > 0)
+                    move = endgame.best_move(game)
+                    if value > 0:
+                        self.assertLess(self.negamax(game.forecast_move(move)), 0)
+                    solved += 1
+                    break
+
+    def test_leaf_evaluation_skips_large_regions(self):
+        rng = random.Random(6)
+        found = False
+        while not found:
+            game = isolation.Board("Player1", "Player2")
+            while game.get_legal_moves():
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+                regions = endgame.separated_regions(game)
+                if game.move_count < endgame.ENDGAME_MIN_MOVES or regions is None:
+                    continue
+                size = max(bin(r).count("1") for r in regions)
+                if endgame.ENDGAME_LEAF_CELLS < size <= endgame.ENDGAME_MAX_CELLS:
+                    # only the root solves the regions too large for the leaves
+                    self.assertIsNone(endgame.solve(game, game.active_player))
+                    self.assertIsNotNone(endgame.solve(
+                        game, game.active_player, endgame.ENDGAME_MAX_CELLS))
+                    self.assertIn(endgame.best_move(game), game.get_legal_moves())
+                    found = True
+                    break
+
+
+class MonteCarloTest(unittest.TestCase):
+    """Check the Monte Carlo tree search agent"""
+
+    def test_mcts_reuses_tree_between_turns(self):
+        random.seed(0)
+        player = competition_agent.CustomPlayer()
+        game = isolation.Board(player, "Player2")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        clock = [2000]
+
+        def time_left():
+            clock[0] -= 1
+            return clock[0]
+
+        move = player.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(player.playouts_per_second, 0)
+        game.apply_move(move)
+
+        # the subtree of the opponent's reply becomes the next root
+        reply, expected = next(iter(player._root.children.items()))
+        game.apply_move((reply % game.height, reply // game.height))
+        self.assertIs(player.reuse_tree(player.board_state(game)), expected)
+        self.assertIsNone(expected.parent)
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Check the opening book builder and file format"""
+
+    def test_book_round_trip_and_symmetry(self):
+        book = opening_book.build_book(plies=2, depth=1)
+        # the empty board and the ten classes of first moves of player 1
+        self.assertEqual(len(book), 1 + 10)
+
+        path = os.path.join(tempfile.mkdtemp(), "book.bin")
+        book.save(path)
+        self.assertEqual(opening_book.OpeningBook.load(path).moves, book.moves)
+
+        # symmetric positions get symmetric book moves
+        corner = isolation.Board("Player1", "Player2")
+        corner.apply_move((0, 0))
+        mirror = isolation.Board("Player1", "Player2")
+        mirror.apply_move((6, 6))
+        r, c = book.lookup(corner)
+        self.assertIn(book.lookup(mirror), [(6 - r, 6 - c), (6 - c, 6 - r)])
+        self.assertIn((r, c), corner.get_legal_moves())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,128 @@
+"""Batched evaluation of the leaf nodes of the isolation search agents.
+
+The heuristics in game_agent.py and sample_players.py score one game state
+at a time, so the last ply of a search creates a board for every child of a
+node and generates the legal moves of both players on each of them, although
+the children of one node differ by a single cell.  The functions in this
+module score all the children of a node at once instead: the blank cells and
+player locations of the parent are read once, and the legal moves of each
+child are then intersections of the precomputed knight-move bitmasks of
+`isolation.bitboard` with the blank cells of the child.
+
+Every function takes the parent game state, the list of moves of its active
+player and the player whose point of view is scored, and returns the list of
+values that the heuristic of the same name returns for each child (or None
+if the parent is not supported, e.g. before both players are placed, in
+which case the caller scores the children one at a time).
+"""
+from isolation.bitboard import move_tables
+
+import endgame
+
+
+def children(parent, moves):
+    """Generate the state of each child of the parent game as a tuple of the
+    blank cells, the cell index of the player who moved (the inactive player
+    of the child) and of the other player (the active player of the child),
+    and the knight-move bitmasks of the two players' locations intersected
+    with the blank cells.
+    """
+    height = parent.height
+    _, masks, _ = move_tables(parent.width, height)
+    other = parent.get_player_location(parent.inactive_player)
+    if other is None:
+        return None
+    other = other[0] + other[1] * height
+
+    open_mask = parent.get_blank_mask()
+    other_mask = masks[other]
+
+    result = []
+    for r, c in moves:
+        idx = r + c * height
+        child_open = open_mask & ~(1 << idx)
+        result.append((child_open, idx, other,
+                       masks[idx] & child_open, other_mask & child_open))
+    return result
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def improved_score(parent, moves, player):
+    """Batched `sample_players.improved_score`. """
+    states = children(parent, moves)
+    if states is None:
+        return None
+    mover = player == parent.active_player
+    scores = []
+    for _, _, _, mover_moves, other_moves in states:
+        if not other_moves:
+            scores.append(float("inf") if mover else float("-inf"))
+        elif mover:
+            scores.append(float(popcount(mover_moves) - popcount(other_moves)))
+        else:
+            scores.append(float(popcount(other_moves) - popcount(mover_moves)))
+    return scores
+
+
+def custom_score(parent, moves, player):
+    """Batched `game_agent.custom_score`. """
+    states = children(parent, moves)
+    if states is None:
+        return None
+    _, masks, _ = move_tables(parent.width, parent.height)
+    solve = parent.move_count + 1 >= endgame.ENDGAME_MIN_MOVES
+    mover = player == parent.active_player
+    scores = []
+    for child_open, idx, other, mover_moves, other_moves in states:
+        if not other_moves:
+            scores.append(float("inf") if mover else float("-inf"))
+            continue
+        wins = endgame.active_wins(child_open, other, idx, masks) if solve else None
+        if wins is not None:
+            scores.append(float("-inf") if wins == mover else float("inf"))
+        elif mover:
+            scores.append(float(popcount(mover_moves) - popcount(other_moves)))
+        else:
+            scores.append(float(popcount(other_moves) - popcount(mover_moves)))
+    return scores
+
+
+def custom_score_2(parent, moves, player, weight=0.25):
+    """Batched `game_agent.custom_score_2`. """
+    states = children(parent, moves)
+    if states is None:
+        return None
+    mover = player == parent.active_player
+    scores = []
+    for _, _, _, mover_moves, other_moves in states:
+        own, opp = (mover_moves, other_moves) if mover else (other_moves, mover_moves)
+        scores.append(float(popcount(own) - popcount(opp)) +
+                      popcount(own & opp) * weight)
+    return scores
+
+
+def custom_score_3(parent, moves, player, weight=0.075):
+    """Batched `game_agent.custom_score_3`. """
+    states = children(parent, moves)
+    if states is None:
+        return None
+    cells, _, _ = move_tables(parent.width, parent.height)
+    center_pos = ((parent.height - 1) / 2.0, (parent.width - 1) / 2.0)
+    mover = player == parent.active_player
+    scores = []
+    for _, idx, other, mover_moves, other_moves in states:
+        if not other_moves:
+            scores.append(float("inf") if mover else float("-inf"))
+            continue
+        if mover:
+            own, opp, player_pos, opponent_pos = mover_moves, other_moves, cells[idx], cells[other]
+        else:
+            own, opp, player_pos, opponent_pos = other_moves, mover_moves, cells[other], cells[idx]
+        player_dist = abs(player_pos[0] - center_pos[0]) + abs(player_pos[1] - center_pos[1])
+        opponent_dist = abs(opponent_pos[0] - center_pos[0]) + abs(opponent_pos[1] - center_pos[1])
+        scores.append(float(popcount(own) - popcount(opp)) +
+                      float(player_dist - opponent_dist) * weight)
+    return scores
@@ -0,0 +1,294 @@
+"""Measure the raw search speed of the isolation board engines and the
+effectiveness of the search enhancements of `AlphaBetaPlayer`.
+
+Every benchmark uses `AlphaBetaPlayer` agents with the `improved_score`
+heuristic and the same per-move time limit used by tournament.py, so the
+numbers translate directly into search depth in tournaments.
+
+    engines   -- nodes per second on each board engine, measured by playing
+                 the same set of randomly selected openings on each engine
+    ordering  -- depth reached, cutoff statistics and effective branching
+                 factor with and without move ordering on random positions
+    scaling   -- nodes per second, depth reached and peak memory of the
+                 search on random positions of square boards of growing size
+    search    -- nodes visited by plain alpha-beta, principal variation
+                 search and aspiration windows to the same fixed depth
+"""
+import argparse
+import random
+import timeit
+import tracemalloc
+
+from isolation import Board, BitBoard
+from sample_players import improved_score
+from game_agent import AlphaBetaPlayer
+from tournament import TIME_LIMIT
+
+NUM_GAMES = 10  # number of games played on each board engine
+NUM_POSITIONS = 50  # number of positions searched by the ordering benchmark
+BOARD_SIZES = [5, 7, 9, 11, 13, 15]  # board sizes of the scaling benchmark
+SEARCH_DEPTH = 8  # depth of the fixed-depth searches of the search benchmark
+
+# (name, search mode, aspiration window) of the search benchmark
+SEARCH_CONFIGS = [("alphabeta", "alphabeta", 0.),
+                  ("pvs", "pvs", 0.),
+                  ("aspiration", "alphabeta", 1.),
+                  ("pvs+aspiration", "pvs", 1.)]
+
+# (name, board class, search in-place with push_move/pop_move)
+ENGINES = [("Board", Board, False),
+           ("Board+push", Board, True),
+           ("BitBoard", BitBoard, False),
+           ("BitBoard+push", BitBoard, True)]
+
+
+def counting_board(board_cls):
+    """Return a subclass of the board class that counts every search node
+    created through `forecast_move` or `push_move`.
+    """
+    class CountingBoard(board_cls):
+        nodes = 0
+
+        def forecast_move(self, move):
+            CountingBoard.nodes += 1
+            return board_cls.forecast_move(self, move)
+
+        def push_move(self, move):
+            CountingBoard.nodes += 1
+            board_cls.push_move(self, move)
+
+        def copy(self):
+            new_board = board_cls.copy(self)
+            new_board.__class__ = CountingBoard
+            return new_board
+
+    CountingBoard.__name__ = "Counting" + board_cls.__name__
+    return CountingBoard
+
+
+def random_openings(num_games, seed, width=7, height=7):
+    """Return a list of random (player 1, player 2) opening move pairs. """
+    rng = random.Random(seed)
+    cells = [(r, c) for r in range(height) for c in range(width)]
+    return [tuple(rng.sample(cells, 2)) for _ in range(num_games)]
+
+
+def nodes_per_second(board_cls, openings, in_place=False,
+                     time_limit=TIME_LIMIT, seed=0):
+    """Play one game per opening on the board class and return the total
+    number of nodes expanded, the number of moves played and the total time
+    spent searching (in seconds).
+    """
+    board_cls = counting_board(board_cls)
+    random.seed(seed)
+    moves = 0
+    elapsed = 0.
+    for opening in openings:
+        player1 = AlphaBetaPlayer(score_fn=improved_score, in_place=in_place)
+        player2 = AlphaBetaPlayer(score_fn=improved_score, in_place=in_place)
+        game = board_cls(player1, player2)
+        for move in opening:
+            game.apply_move(move)
+
+        start = timeit.default_timer()
+        _, history, _ = game.play(time_limit=time_limit)
+        elapsed += timeit.default_timer() - start
+        moves += len(history)
+    return board_cls.nodes, moves, elapsed
+
+
+def random_positions(num_positions, seed, width=7, height=7,
+                     min_moves=4, max_moves=20):
+    """Return a list of random non-terminal game states with player 1 to
+    move, each given as the list of moves that reaches it from an empty board.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = BitBoard("Player1", "Player2", width=width, height=height)
+        history = []
+        for _ in range(2 * rng.randint(min_moves // 2, max_moves // 2)):
+            moves = sorted(game.get_legal_moves())
+            if not moves:
+                break
+            history.append(rng.choice(moves))
+            game.apply_move(history[-1])
+        if game.get_legal_moves() and game.move_count % 2 == 0:
+            positions.append(history)
+    return positions
+
+
+def search_statistics(make_player, positions, time_limit=TIME_LIMIT,
+                      width=7, height=7):
+    """Search every position with a fresh player built by `make_player()`
+    and return the list of `SearchStats` collected by each get_move() call.
+    """
+    results = []
+    for position in positions:
+        player = make_player()
+        game = BitBoard(player, "Player2", width=width, height=height)
+        for move in position:
+            game.apply_move(move)
+        start = timeit.default_timer()
+        time_left = lambda: time_limit - 1000 * (timeit.default_timer() - start)
+        player.get_move(game, time_left)
+        results.append(player.stats)
+    return results
+
+
+def fixed_depth_statistics(make_player, positions, depth):
+    """Search every position with a fresh player built by `make_player()`
+    until iterative deepening completes `depth` iterations, and return the
+    (SearchStats, value of the root, search time in seconds) triple of each
+    get_move() call.
+    """
+    results = []
+    for position in positions:
+        player = make_player()
+        game = BitBoard(player, "Player2")
+        for move in position:
+            game.apply_move(move)
+        # the timer expires as soon as the last iteration is complete
+        time_left = lambda: float("inf") if player.stats.depth < depth else float("-inf")
+        start = timeit.default_timer()
+        player.get_move(game, time_left)
+        results.append((player.stats, player.root_value,
+                        timeit.default_timer() - start))
+    return results
+
+
+def scaling_statistics(positions, width, height, time_limit=TIME_LIMIT):
+    """Search every position with a fresh player and return the nodes per
+    second, the mean depth reached and the mean peak memory allocated by one
+    get_move() call (in kilobytes).
+
+    The memory is measured in a second pass with tracemalloc enabled, since
+    tracing slows the search down.
+    """
+    nodes = 0
+    elapsed = 0.
+    depths = []
+    peaks = []
+    for trace in (False, True):
+        for position in positions:
+            player = AlphaBetaPlayer(score_fn=improved_score)
+            game = BitBoard(player, "Player2", width=width, height=height)
+            for move in position:
+                game.apply_move(move)
+            if trace:
+                tracemalloc.start()
+            start = timeit.default_timer()
+            time_left = lambda: time_limit - 1000 * (timeit.default_timer() - start)
+            player.get_move(game, time_left)
+            if trace:
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+                tracemalloc.stop()
+            else:
+                elapsed += timeit.default_timer() - start
+                nodes += player.stats.nodes
+                depths.append(player.stats.depth)
+    return nodes / elapsed, mean(depths), mean(peaks)
+
+
+def mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else 0.
+
+
+def ordering(num_positions, seed):
+    positions = random_positions(num_positions, seed)
+
+    print("\n{:^10}{:^8}{:^12}{:^10}{:^14}{:^10}".format(
+        "Ordering", "Depth", "Nodes", "Cutoffs", "1st-move cut", "EBF"))
+    print("-" * 64)
+    for enabled in (False, True):
+        random.seed(seed)
+        stats = search_statistics(lambda: AlphaBetaPlayer(
+            score_fn=improved_score, move_ordering=enabled), positions)
+        print("{:^10}{:^8.2f}{:^12.0f}{:^10.0f}{:^14.1%}{:^10.2f}".format(
+            "on" if enabled else "off",
+            mean(s.depth for s in stats),
+            mean(s.nodes for s in stats),
+            mean(s.cutoffs for s in stats),
+            mean(s.first_move_cutoff_rate() for s in stats),
+            mean(s.branching_factor() for s in stats)))
+
+
+def scaling(num_positions, seed, sizes=BOARD_SIZES):
+    print("\n{:^8}{:^8}{:^12}{:^10}{:^14}".format(
+        "Board", "Cells", "Nodes/sec", "Depth", "Peak KB"))
+    print("-" * 52)
+    for size in sizes:
+        positions = random_positions(num_positions, seed, width=size, height=size)
+        random.seed(seed)
+        nps, depth, peak = scaling_statistics(positions, size, size)
+        print("{:^8}{:^8}{:^12.0f}{:^10.2f}{:^14.0f}".format(
+            "{0}x{0}".format(size), size * size, nps, depth, peak))
+
+
+def search(num_positions, seed, depth=SEARCH_DEPTH):
+    positions = random_positions(num_positions, seed)
+    results = []
+    for _, mode, window in SEARCH_CONFIGS:
+        random.seed(seed)
+        results.append(fixed_depth_statistics(lambda: AlphaBetaPlayer(
+            score_fn=improved_score, search_mode=mode, aspiration_window=window,
+            time_management=False), positions, depth))
+
+    # positions solved without searching (or with fewer blank cells than
+    # the depth) are left out of every row
+    searched = [i for i, (stats, _, _) in enumerate(results[0]) if stats.depth == depth]
+    baseline = [results[0][i] for i in searched]
+    print("\n{} positions searched to depth {}".format(len(searched), depth))
+    print("\n{:^16}{:^10}{:^10}{:^12}{:^12}{:^10}".format(
+        "Search", "Nodes", "vs AB", "Re-searches", "Same value", "Time ms"))
+    print("-" * 70)
+    for (name, _, _), rows in zip(SEARCH_CONFIGS, results):
+        rows = [rows[i] for i in searched]
+        nodes = mean(stats.nodes for stats, _, _ in rows)
+        print("{:^16}{:^10.0f}{:^10.1%}{:^12.1f}{:^12.1%}{:^10.1f}".format(
+            name, nodes, nodes / mean(stats.nodes for stats, _, _ in baseline),
+            mean(stats.researches for stats, _, _ in rows),
+            mean(value == base[1] for (_, value, _), base in zip(rows, baseline)),
+            1000 * mean(elapsed for _, _, elapsed in rows)))
+
+
+def engines(num_games, seed):
+    openings = random_openings(num_games, seed)
+
+    print("\n{:^16}{:^10}{:^10}{:^14}{:^14}".format(
+        "Engine", "Games", "Moves", "Nodes", "Nodes/sec"))
+    print("-" * 64)
+    for name, board_cls, in_place in ENGINES:
+        nodes, moves, elapsed = nodes_per_second(board_cls, openings,
+                                                 in_place=in_place, seed=seed)
+        print("{:^16}{:^10}{:^10}{:^14}{:^14.0f}".format(
+            name, len(openings), moves, nodes, nodes / elapsed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the isolation " +
+        "board engines and alpha-beta search enhancements at the tournament " +
+        "time limit.")
+    parser.add_argument('suite', nargs='?', default='engines',
+                        choices=['engines', 'ordering', 'scaling', 'search'],
+                        help="The benchmark to run.")
+    parser.add_argument('-n', '--games', type=int, default=NUM_GAMES,
+                        help="Number of games played on each board engine.")
+    parser.add_argument('-p', '--positions', type=int, default=NUM_POSITIONS,
+                        help="Number of positions searched by the search benchmarks.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=BOARD_SIZES,
+                        help="Board sizes of the scaling benchmark.")
+    parser.add_argument('--depth', type=int, default=SEARCH_DEPTH,
+                        help="Search depth of the search benchmark.")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Seed used to select the random openings and positions.")
+    args = parser.parse_args()
+    if args.suite == 'engines':
+        engines(args.games, args.seed)
+    elif args.suite == 'ordering':
+        ordering(args.positions, args.seed)
+    elif args.suite == 'scaling':
+        scaling(args.positions, args.seed, args.sizes)
+    elif args.suite == 'search':
+        search(args.positions, args.seed, args.depth)
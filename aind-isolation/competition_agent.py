@@ -4,7 +4,15 @@ champions) in a tournament.
 
          COMPLETING AND SUBMITTING A COMPETITION AGENT IS OPTIONAL
 """
+import math
+import multiprocessing
 import random
+import timeit
+
+from isolation.bitboard import move_tables
+
+UCT_C = math.sqrt(2)  # exploration constant of the UCT selection rule
+ROLLOUT_BATCH = 16  # number of rollouts run by each worker for one leaf
 
 
 class SearchTimeout(Exception):
@@ -36,13 +44,90 @@ def custom_score(game, player):
     raise NotImplementedError
 
 
+def rollout(blocked, loc, other, masks, full, rng=random):
+    """Play uniformly random moves on a bitmask board until a player has no
+    legal move.
+
+    Parameters
+    ----------
+    blocked : int
+        The bitmask of the blocked cells
+
+    loc, other : int or None
+        The cell index of the player to move and of its opponent (None if the
+        player has not been placed on the board)
+
+    masks : tuple<int>
+        The knight-move bitmask of each cell index
+
+    full : int
+        The bitmask of all the cells of the board
+
+    Returns
+    -------
+    int
+        1 if the player to move wins the playout, 0 otherwise
+    """
+    turn = 0
+    while True:
+        moves = full & ~blocked if loc is None else masks[loc] & ~blocked
+        if not moves:
+            return turn
+        cells = []
+        while moves:
+            low = moves & -moves
+            cells.append(low)
+            moves ^= low
+        bit = rng.choice(cells)
+        blocked |= bit
+        loc, other = other, bit.bit_length() - 1
+        turn ^= 1
+
+
+def rollout_batch(args):
+    """Run a batch of rollouts from the same state in a worker process and
+    return the number of playouts won by the player to move.
+    """
+    blocked, loc, other, width, height, count, seed = args
+    _, masks, _ = move_tables(width, height)
+    full = (1 << (width * height)) - 1
+    rng = random.Random(seed)
+    return sum(rollout(blocked, loc, other, masks, full, rng) for _ in range(count))
+
+
+class Node:
+    """A node of the Monte Carlo search tree.
+
+    Each node is reached by one move, and accumulates the number of playouts
+    that went through it and the number of those playouts that were won by
+    the player who made the move.
+    """
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, parent, untried):
+        self.move = move
+        self.parent = parent
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+
+    def select(self, exploration):
+        """Return the child maximizing the UCT upper confidence bound. """
+        log_visits = math.log(self.visits)
+        return max(self.children.values(), key=lambda child:
+                   child.wins / child.visits +
+                   exploration * math.sqrt(log_visits / child.visits))
+
+
 class CustomPlayer:
     """Game-playing agent to use in the optional player vs player Isolation
     competition.
 
-    You must at least implement the get_move() method and a search function
-    to complete this class, but you may use any of the techniques discussed
-    in lecture or elsewhere on the web -- opening books, MCTS, etc.
+    The agent chooses its moves with Monte Carlo tree search using the UCT
+    selection rule and uniformly random playouts on a bitmask board. The tree
+    is kept between turns: the subtree reached by the agent's last move and
+    the opponent's reply becomes the root of the next search.
 
     **************************************************************************
           THIS CLASS IS OPTIONAL -- IT IS ONLY USED IN THE ISOLATION PvP
@@ -59,12 +144,60 @@ class CustomPlayer:
         the PvP competition uses more accurate timers that are not cross-
         platform compatible, so a limit of 1ms (vs 10ms for the other classes)
         is generally sufficient.
+
+    workers : int (optional)
+        Number of processes running the playouts; with more than one worker
+        every selected leaf is evaluated by a batch of `batch_size` playouts
+        in each worker. The processes are started by the constructor and
+        shut down by close().
+
+    batch_size : int (optional)
+        Number of playouts run by each worker for one leaf.
+
+    exploration : float (optional)
+        The exploration constant of the UCT selection rule.
+
+    Attributes
+    ----------
+    playouts : int
+        The number of playouts run by the last get_move() call.
+
+    playouts_per_second : float
+        The playout rate of the last get_move() call.
     """
 
-    def __init__(self, data=None, timeout=1.):
+    def __init__(self, data=None, timeout=1., workers=1,
+                 batch_size=ROLLOUT_BATCH, exploration=UCT_C):
         self.score = custom_score
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.workers = workers
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.playouts = 0
+        self.playouts_per_second = 0.
+        self._pool = multiprocessing.Pool(workers) if workers > 1 else None
+        self._root = None
+        self._root_state = None
+
+    def __getstate__(self):
+        # the timer, search tree and worker pool belong to the current game
+        state = self.__dict__.copy()
+        state.update(time_left=None, _pool=None, _root=None, _root_state=None)
+        return state
+
+    def search_summary(self):
+        """Return a dictionary describing the search performed by the last
+        get_move() call (see `search_trace.py`).
+        """
+        return {"playouts": self.playouts,
+                "playouts_per_second": self.playouts_per_second}
+
+    def close(self):
+        """Shut down the worker processes. """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -93,5 +226,120 @@ class CustomPlayer:
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        # OPTIONAL: Finish this function!
-        raise NotImplementedError
+        self.time_left = time_left
+        start = timeit.default_timer()
+        cells, masks, _ = move_tables(game.width, game.height)
+        full = (1 << (game.width * game.height)) - 1
+        state = self.board_state(game)
+
+        root = self.reuse_tree(state)
+        if root is None:
+            root = Node(None, None, self.legal_cells(state, masks, full))
+        if not root.untried and not root.children:
+            return (-1, -1)
+
+        self.playouts = 0
+        while self.time_left() > self.TIMER_THRESHOLD:
+            self.playouts += self.search(root, state, masks, full, game.width, game.height)
+
+        best = max(root.children.values(), key=lambda child: child.visits,
+                   default=None)
+        if best is None:
+            best = Node(random.choice(root.untried), root, [])
+            root.children[best.move] = best
+
+        elapsed = timeit.default_timer() - start
+        self.playouts_per_second = self.playouts / elapsed if elapsed else 0.
+        self._root = best
+        self._root_state = self.next_state(state, best.move)
+        return cells[best.move]
+
+    def search(self, root, state, masks, full, width, height):
+        """Run one selection, expansion, simulation and backpropagation step
+        from the root and return the number of playouts run.
+        """
+        # selection
+        node = root
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+            state = self.next_state(state, node.move)
+
+        # expansion
+        if node.untried:
+            move = node.untried.pop(random.randrange(len(node.untried)))
+            state = self.next_state(state, move)
+            child = Node(move, node, self.legal_cells(state, masks, full))
+            node.children[move] = child
+            node = child
+
+        # simulation; the wins are counted for the player to move in the leaf
+        blocked, loc, other = state
+        if self._pool is not None:
+            tasks = [(blocked, loc, other, width, height, self.batch_size,
+                      random.getrandbits(32)) for _ in range(self.workers)]
+            count = self.workers * self.batch_size
+            wins = sum(self._pool.map(rollout_batch, tasks))
+        else:
+            count = 1
+            wins = rollout(blocked, loc, other, masks, full)
+
+        # backpropagation; every node counts the wins of the player who moved
+        while node is not None:
+            wins = count - wins
+            node.visits += count
+            node.wins += wins
+            node = node.parent
+        return count
+
+    def reuse_tree(self, state):
+        """Return the subtree of the previous search reached by the opponent's
+        reply, or None if the game does not continue the previous search.
+        """
+        root, self._root = self._root, None
+        expected, self._root_state = self._root_state, None
+        if root is None or state[2] is None:
+            return None
+
+        # the opponent's reply is the cell it occupies now
+        reply = state[2]
+        if self.next_state(expected, reply) != state:
+            return None
+        child = root.children.get(reply)
+        if child is not None:
+            child.parent = None
+        return child
+
+    @staticmethod
+    def board_state(game):
+        """Return the (blocked cells, location of the player to move,
+        location of the opponent) bitmask representation of the game.
+        """
+        height = game.height
+        blocked = (1 << (game.width * height)) - 1
+        for r, c in game.get_blank_spaces():
+            blocked &= ~(1 << (r + c * height))
+        locations = []
+        for player in (game.active_player, game.inactive_player):
+            loc = game.get_player_location(player)
+            locations.append(None if loc is None else loc[0] + loc[1] * height)
+        return blocked, locations[0], locations[1]
+
+    @staticmethod
+    def next_state(state, move):
+        """Return the state reached by moving the player to move to the cell
+        index `move`.
+        """
+        blocked, loc, other = state
+        return blocked | 1 << move, other, move
+
+    @staticmethod
+    def legal_cells(state, masks, full):
+        """Return the list of cell indices the player to move can move to. """
+        blocked, loc, _ = state
+        moves = full & ~blocked if loc is None else masks[loc] & ~blocked
+        cells = []
+        while moves:
+            low = moves & -moves
+            cells.append(low.bit_length() - 1)
+            moves ^= low
+        return cells
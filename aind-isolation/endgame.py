@@ -0,0 +1,215 @@
+"""Exact endgame solver for the game Isolation.
+
+Once no blank cell can be reached by both players, the players can no longer
+interfere with each other: each one walks through its own region of the
+board, and the player to move loses as soon as its longest knight's path is
+not longer than the opponent's.  Both paths are computed exactly by
+depth-first search over the region, with the results memoised on (cell,
+remaining cells) pairs, so separated endgames are decided without searching
+the game tree.
+
+Cells are numbered as in `isolation.Board` (index = row + column * height)
+and sets of cells are integer bitmasks, using the knight-move tables of
+`isolation.bitboard`.
+"""
+from isolation.bitboard import move_tables
+
+# Endgames are only detected once this many moves have been played; the
+# players cannot be separated earlier on a 7x7 board in practice, and the
+# flood fill would only slow down the evaluation of opening positions
+ENDGAME_MIN_MOVES = 12
+
+# Regions larger than this are not solved exactly, since the longest path
+# search is exponential in the size of the region
+ENDGAME_MAX_CELLS = 20
+
+# The leaf evaluations of the search (solve() and active_wins()) cannot be
+# interrupted by the timer, so they only solve smaller regions: an uncached
+# solve takes up to about 1 ms with 14 cells but 25 ms with 20 cells, more than
+# the timer threshold of the agents
+ENDGAME_LEAF_CELLS = 14
+
+# The memoised longest paths are dropped once the cache holds this many entries
+CACHE_SIZE = 1 << 18
+
+_CACHE = {}
+
+
+def clear_cache():
+    """Remove every memoised longest path. """
+    _CACHE.clear()
+
+
+def open_cells(game):
+    """Return the bitmask of the blank cells of the game. """
+    return game.get_blank_mask()
+
+
+def region(idx, open_mask, masks, stop=0):
+    """Return the bitmask of the open cells reachable by a knight starting
+    from cell `idx` (the start cell itself is not included). The flood fill
+    ends early, returning the cells reached so far, as soon as it reaches a
+    cell of the `stop` bitmask.
+    """
+    reached = 0
+    frontier = masks[idx] & open_mask
+    while frontier:
+        reached |= frontier
+        if reached & stop:
+            break
+        expand = 0
+        while frontier:
+            low = frontier & -frontier
+            expand |= masks[low.bit_length() - 1]
+            frontier ^= low
+        frontier = expand & open_mask & ~reached
+    return reached
+
+
+def longest_path(idx, open_mask, masks):
+    """Return the number of moves in the longest knight's path that starts
+    from cell `idx` and visits only cells of `open_mask`.
+    """
+    open_mask &= region(idx, open_mask, masks)
+    return _longest_path(idx, open_mask, masks)
+
+
+def _longest_path(idx, open_mask, masks):
+    key = (idx, open_mask)
+    if key in _CACHE:
+        return _CACHE[key]
+
+    bound = bin(open_mask).count("1")
+    best = 0
+    moves = masks[idx] & open_mask
+    while moves and best < bound:
+        low = moves & -moves
+        best = max(best, 1 + _longest_path(low.bit_length() - 1,
+                                           open_mask ^ low, masks))
+        moves ^= low
+
+    if len(_CACHE) >= CACHE_SIZE:
+        _CACHE.clear()
+    _CACHE[key] = best
+    return best
+
+
+def separate(open_mask, active_idx, inactive_idx, masks):
+    """Return the bitmasks of the regions reachable from the cells of the
+    active and the inactive player if they are disjoint, or None.
+    """
+    # the regions overlap iff the active player reaches an open neighbor of
+    # the inactive player, so the flood fill stops as soon as it does
+    inactive_neighbors = masks[inactive_idx] & open_mask
+    active_region = region(active_idx, open_mask, masks, stop=inactive_neighbors)
+    if active_region & inactive_neighbors:
+        return None
+    return active_region, region(inactive_idx, open_mask, masks)
+
+
+def active_wins(open_mask, active_idx, inactive_idx, masks,
+                max_cells=ENDGAME_LEAF_CELLS):
+    """Return True if the player to move wins the endgame, False if it loses,
+    or None if the players are not separated or a region has more than
+    `max_cells` cells.
+
+    Parameters
+    ----------
+    open_mask : int
+        The bitmask of the blank cells
+
+    active_idx, inactive_idx : int
+        The cell index of the player to move and of its opponent
+
+    masks : tuple<int>
+        The knight-move bitmask of each cell index
+
+    max_cells : int (optional)
+        The size of the largest region solved exactly
+    """
+    regions = separate(open_mask, active_idx, inactive_idx, masks)
+    if regions is None or max(bin(r).count("1") for r in regions) > max_cells:
+        return None
+
+    # the player to move runs out of moves first on equal path lengths
+    return (_longest_path(active_idx, regions[0], masks) >
+            _longest_path(inactive_idx, regions[1], masks))
+
+
+def separated_regions(game):
+    """Return the bitmasks of the regions reachable by the active and the
+    inactive player if they are disjoint, or None if the players may still
+    interfere with each other (or have not both been placed on the board).
+    """
+    active = game.get_player_location(game.active_player)
+    inactive = game.get_player_location(game.inactive_player)
+    if active is None or inactive is None:
+        return None
+
+    _, masks, _ = move_tables(game.width, game.height)
+    return separate(open_cells(game), active[0] + active[1] * game.height,
+                    inactive[0] + inactive[1] * game.height, masks)
+
+
+def solve(game, player, max_cells=ENDGAME_LEAF_CELLS):
+    """Return the exact utility of a separated endgame for `player`.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : object
+        A player instance in the current game (i.e., an object corresponding to
+        one of the player objects `game.__player_1__` or `game.__player_2__`.)
+
+    max_cells : int (optional)
+        The size of the largest region solved exactly
+
+    Returns
+    -------
+    float or None
+        +inf if `player` wins and -inf if `player` loses with perfect play, or
+        None if the players are not separated or a region has more than
+        `max_cells` cells.
+    """
+    if game.move_count < ENDGAME_MIN_MOVES:
+        return None
+    active = game.get_player_location(game.active_player)
+    inactive = game.get_player_location(game.inactive_player)
+    if active is None or inactive is None:
+        return None
+
+    _, masks, _ = move_tables(game.width, game.height)
+    wins = active_wins(open_cells(game), active[0] + active[1] * game.height,
+                       inactive[0] + inactive[1] * game.height, masks, max_cells)
+    if wins is None:
+        return None
+    if wins == (player == game.active_player):
+        return float("inf")
+    return float("-inf")
+
+
+def best_move(game):
+    """Return the first move of the longest path of the active player if the
+    game is a separated endgame that can be solved exactly, or None.
+
+    Following the longest path is optimal for both a won and a lost endgame,
+    since the outcome only depends on the length of the paths.
+    """
+    if game.move_count < ENDGAME_MIN_MOVES:
+        return None
+    regions = separated_regions(game)
+    if regions is None or max(bin(r).count("1") for r in regions) > ENDGAME_MAX_CELLS:
+        return None
+
+    _, masks, _ = move_tables(game.width, game.height)
+    cells = regions[0]
+    best, best_length = None, -1
+    for r, c in game.get_legal_moves():
+        bit = 1 << (r + c * game.height)
+        length = _longest_path(r + c * game.height, cells ^ bit, masks)
+        if length > best_length:
+            best, best_length = (r, c), length
+    return best
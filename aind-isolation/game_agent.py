@@ -2,6 +2,17 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import threading
+import time
+import weakref
+
+from functools import partial
+
+import batch_scoring
+import endgame
+from time_manager import TimeManager
+from isolation.symmetry import board_symmetry
+from transposition import TranspositionTable, TT_SIZE, EXACT, LOWER, UPPER
 
 
 class SearchTimeout(Exception):
@@ -9,6 +20,24 @@ class SearchTimeout(Exception):
     pass
 
 
+# Delay (in seconds) before a pondering search starts, so that the thread
+# does not compete with the agent for the interpreter while get_move() returns
+PONDER_DELAY = 0.005
+
+# Longest time (in seconds) a pondering search runs if get_move() is not called
+# again, e.g. after the game ended on the opponent's move
+PONDER_TIMEOUT = 1.
+
+# Search algorithms of AlphaBetaPlayer: minimax with alpha-beta pruning, or
+# negamax principal variation search (see AlphaBetaPlayer.pvs)
+SEARCH_MODES = ("alphabeta", "pvs")
+
+# Width of the null windows of principal variation search; heuristic values
+# are floats, so a null window is an interval narrower than any difference
+# between the values that matter
+NULL_WINDOW = 1e-6
+
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -40,6 +69,11 @@ def custom_score(game, player):
     if game.is_loser(player):
         return float("-inf")
 
+    # once the players are separated the outcome is decided exactly
+    outcome = endgame.solve(game, player)
+    if outcome is not None:
+        return outcome
+
     # use a difference between number of player and opponent moves
     # it is a basic score
     player_moves = game.get_legal_moves(player)
@@ -47,7 +81,7 @@ def custom_score(game, player):
 
     return float(len(player_moves) - len(opponent_moves))
 
-def custom_score_2(game, player):
+def custom_score_2(game, player, weight=0.25):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
 
@@ -64,6 +98,10 @@ def custom_score_2(game, player):
         A player instance in the current game (i.e., an object corresponding to
         one of the player objects `game.__player_1__` or `game.__player_2__`.)
 
+    weight : float (optional)
+        The weight of each move shared by the player and its opponent; the
+        default is an empirical value (see tune.py to tune it)
+
     Returns
     -------
     float
@@ -83,14 +121,11 @@ def custom_score_2(game, player):
             if player_move[0] == opponent_move[0] and player_move[1] == opponent_move[1]:
                 num_matched_moves += 1
 
-    # the weight of a calcualted metric is an empirical value
-    weight = 0.25
-
     # improve a basis score with weighted metric
     return float(len(player_moves) - len(opponent_moves)) + num_matched_moves * weight
 
 
-def custom_score_3(game, player):
+def custom_score_3(game, player, weight=0.075):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
 
@@ -111,6 +146,11 @@ def custom_score_3(game, player):
         A player instance in the current game (i.e., an object corresponding to
         one of the player objects `game.__player_1__` or `game.__player_2__`.)
 
+    weight : float (optional)
+        The weight of the difference between the distances of the player
+        and of its opponent to the center; the default is an empirical value
+        (see tune.py to tune it)
+
     Returns
     -------
     float
@@ -131,25 +171,124 @@ def custom_score_3(game, player):
     # for player and its opponent to calculate positional advantages
     player_pos = game.get_player_location(player)
     opponent_pos = game.get_player_location(opponent)
-    center_pos = (float(game.height) / 2.0, float(game.width) / 2.0)
-
-    player_dist = abs(player_pos[0] - center_pos[0]) + abs(player_pos[1] - opponent_pos[1])
-    opponent_dist = abs(opponent_pos[0] - center_pos[0]) + abs(opponent_pos[1] - opponent_pos[1])
+    # the center cell is at ((height - 1) / 2, (width - 1) / 2) for any board
+    # geometry (between cells if a dimension is even)
+    center_pos = ((game.height - 1) / 2.0, (game.width - 1) / 2.0)
 
-    # the weight of a calcualted advantage is an empirical value
-    weight = 0.075
+    player_dist = abs(player_pos[0] - center_pos[0]) + abs(player_pos[1] - center_pos[1])
+    opponent_dist = abs(opponent_pos[0] - center_pos[0]) + abs(opponent_pos[1] - center_pos[1])
 
     # improve a basis score with weighted positional advantage
     return float(len(player_moves) - len(opponent_moves)) + \
            float(player_dist - opponent_dist) * weight
 
 
+# Batched versions of the heuristics, used by score_batch(); other modules
+# register the batched versions of their own heuristics here.  The keys are
+# weak references, so registered score functions (e.g. learned evaluators) are
+# released with their last player; the values must not refer to their key.
+BATCH_SCORES = weakref.WeakKeyDictionary({
+    custom_score: batch_scoring.custom_score,
+    custom_score_2: batch_scoring.custom_score_2,
+    custom_score_3: batch_scoring.custom_score_3})
+
+
+def batch_score_fn(score_fn):
+    """Return the batched version of a heuristic registered in BATCH_SCORES,
+    or None if it has none.
+
+    A `functools.partial` of a heuristic with keyword arguments resolves to
+    the same partial of the batched version of the heuristic.
+    """
+    if score_fn in BATCH_SCORES:
+        return BATCH_SCORES[score_fn]
+    if isinstance(score_fn, partial) and not score_fn.args and score_fn.func in BATCH_SCORES:
+        return partial(BATCH_SCORES[score_fn.func], **score_fn.keywords)
+    return None
+
+
+def score_batch(parent, moves, player, score_fn=custom_score):
+    """Score every child of a game state with a heuristic in one pass.
+
+    Parameters
+    ----------
+    parent : `isolation.Board`
+        The game state whose children are scored
+
+    moves : list<(int, int)>
+        Legal moves of the active player of `parent`
+
+    player : object
+        The player whose point of view is scored
+
+    score_fn : callable (optional)
+        The heuristic, or a `functools.partial` of a heuristic with keyword
+        arguments; heuristics without a batched version in BATCH_SCORES are
+        called on each child in turn
+
+    Returns
+    -------
+    list<float>
+        The value of `score_fn(parent.forecast_move(move), player)` for each
+        move
+    """
+    batch_fn = batch_score_fn(score_fn)
+    scores = batch_fn(parent, moves, player) if batch_fn is not None else None
+    if scores is None:
+        scores = [score_fn(parent.forecast_move(move), player) for move in moves]
+    return scores
+
+
+class SearchStats:
+    """Counters describing the search performed by an agent during a single
+    get_move() call.
+
+    Attributes
+    ----------
+    nodes : int
+        Number of game states visited (interior nodes and scored leaves)
+
+    cutoffs : int
+        Number of nodes whose remaining moves were pruned by a beta cutoff
+
+    first_move_cutoffs : int
+        Number of cutoffs produced by the first move searched at a node;
+        a high ratio to `cutoffs` means the move ordering is working
+
+    depth : int
+        Depth of the deepest completed search iteration
+
+    iteration_nodes : list<int>
+        Number of nodes visited by each completed search iteration
+
+    researches : int
+        Number of subtrees searched again with a wider window after a null
+        window or aspiration window search failed
+    """
+    def __init__(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.depth = 0
+        self.iteration_nodes = []
+        self.researches = 0
+
+    def first_move_cutoff_rate(self):
+        """Return the fraction of cutoffs produced by the first move. """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.
+
+    def branching_factor(self):
+        """Return the effective branching factor, i.e., the average growth in
+        nodes visited between consecutive completed iterations.
+        """
+        ratios = [n / p for p, n in zip(self.iteration_nodes, self.iteration_nodes[1:]) if p]
+        return sum(ratios) / len(ratios) if ratios else 0.
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
 
-    ********************  DO NOT MODIFY THIS CLASS  ********************
-
     Parameters
     ----------
     search_depth : int (optional)
@@ -165,12 +304,70 @@ class IsolationPlayer:
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    in_place : bool (optional)
+        Search by applying and reverting moves on the game passed to
+        get_move() with `push_move()`/`pop_move()` instead of creating a copy
+        of the board for every node with `forecast_move()`.
     """
-    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.):
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False):
         self.search_depth = search_depth
         self.score = score_fn
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.in_place = in_place
+        self.stats = SearchStats()
+
+    def __getstate__(self):
+        """Drop the timer of the last get_move() call when pickling the player
+        (e.g., to send it to a tournament worker process); it is a closure
+        that cannot be pickled and is replaced on the next call anyway.
+        """
+        state = self.__dict__.copy()
+        state["time_left"] = None
+        return state
+
+    def search_summary(self):
+        """Return a dictionary describing the search performed by the last
+        get_move() call (see `search_trace.py`).
+        """
+        return {"depth": self.stats.depth,
+                "nodes": self.stats.nodes,
+                "cutoffs": self.stats.cutoffs,
+                "branching_factor": self.stats.branching_factor()}
+
+    def search_child(self, game, move, search_fn, *args):
+        """Evaluate the successor of a game state reached by a move.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+
+        move : (int, int)
+            A legal move for the active player in the current game state
+
+        search_fn : callable
+            The function called as `search_fn(child, *args)` on the successor
+            game state (e.g., `self.score` or `self.min_value`)
+
+        Returns
+        -------
+        object
+            The value returned by `search_fn`. In in-place mode the move is
+            reverted before returning, even if the search raised an exception.
+        """
+        self.stats.nodes += 1
+        if not self.in_place:
+            return search_fn(game.forecast_move(move), *args)
+
+        game.push_move(move)
+        try:
+            return search_fn(game, *args)
+        finally:
+            game.pop_move()
 
 
 class MinimaxPlayer(IsolationPlayer):
@@ -208,6 +405,7 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        self.stats = SearchStats()
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -216,7 +414,9 @@ class MinimaxPlayer(IsolationPlayer):
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            self.stats.depth = self.search_depth
+            return best_move
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
@@ -279,7 +479,7 @@ class MinimaxPlayer(IsolationPlayer):
             highest_score = float("-inf")
             best_move = (-1, -1)
             for move in game.get_legal_moves():
-                score = self.score(game.forecast_move(move), self)
+                score = self.search_child(game, move, self.score, self)
                 if highest_score < score:
                     highest_score = score
                     best_move = move
@@ -288,7 +488,7 @@ class MinimaxPlayer(IsolationPlayer):
         # in other cases select maxium from legal moves that has a highest advantage for
         # the player
         return max(game.get_legal_moves(),
-                   key=lambda move: self.min_value(game.forecast_move(move), depth - 1))
+                   key=lambda move: self.search_child(game, move, self.min_value, depth - 1))
 
     def is_game_over(self, game):
         """
@@ -335,11 +535,11 @@ class MinimaxPlayer(IsolationPlayer):
         lowest_score = float("inf")
         for move in game.get_legal_moves():
             if depth <= 1:
-                lowest_score = min(lowest_score, self.score(game.forecast_move(move), self))
+                lowest_score = min(lowest_score, self.search_child(game, move, self.score, self))
             else:
                 lowest_score = min(
                     lowest_score,
-                    self.max_value(game.forecast_move(move), depth - 1))
+                    self.search_child(game, move, self.max_value, depth - 1))
 
         return lowest_score
 
@@ -370,11 +570,11 @@ class MinimaxPlayer(IsolationPlayer):
         highest_score = float("-inf")
         for move in game.get_legal_moves():
             if depth <= 1:
-                highest_score = max(highest_score, self.score(game.forecast_move(move), self))
+                highest_score = max(highest_score, self.search_child(game, move, self.score, self))
             else:
                 highest_score = max(
                     highest_score,
-                    self.min_value(game.forecast_move(move), depth - 1))
+                    self.search_child(game, move, self.min_value, depth - 1))
 
         return highest_score
 
@@ -382,7 +582,101 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    tt_size : int (optional)
+        The maximum number of entries in the transposition table shared by
+        all the search iterations of one get_move() call; 0 disables the
+        transposition table.
+
+    tt_megabytes : float (optional)
+        The memory budget of the transposition table in megabytes (see
+        `TranspositionTable.from_megabytes`); overrides `tt_size` if given.
+
+    opening_book : opening_book.OpeningBook (optional)
+        A book of precomputed moves looked up by board hash before searching.
+
+    batch_scoring : bool (optional)
+        Score all the children of a node at the last ply with one
+        score_batch() call instead of one score_fn call per child, if the
+        heuristic has a batched version in BATCH_SCORES.
+
+    time_management : bool (optional)
+        Stop iterative deepening early when the next iteration is predicted
+        not to finish before the timer reaches TIMER_THRESHOLD, except in
+        critical positions where the best move just changed (see
+        `time_manager.TimeManager`). TIMER_THRESHOLD stays the hard limit.
+
+    ponder : bool (optional)
+        Keep searching in a background thread while the opponent chooses its
+        reply: the thread searches the position after the agent's move and
+        fills the transposition table, which is then kept for the next
+        get_move() call instead of being cleared, so the search of the actual
+        reply starts from the entries of the matching subtree. The thread is
+        stopped at the start of the next get_move() call, and `stats` counts
+        the pondering search until then. In a match played within a single
+        interpreter the thread competes with the opponent for the CPU, so
+        pondering is only useful when the opponent runs elsewhere.
+
+    symmetry_plies : int (optional)
+        Key the transposition table entries of the game states reached in
+        fewer than `symmetry_plies` moves by their canonical key (see
+        `isolation.symmetry`), so that the rotations and reflections of a
+        state share one entry. Symmetric states are common at the start of
+        the game but rare later on, where computing the canonical key costs
+        more than it saves; 0 disables canonical keys.
+
+    move_ordering : bool (optional)
+        Search the best move of the previous iteration (or the move stored in
+        the transposition table) first, followed by killer moves and then the
+        remaining moves by history score.  Killer moves and history scores
+        carry over between the iterations of one get_move() call.
+
+    search_mode : str (optional)
+        "alphabeta" searches every move with the (alpha, beta) window of its
+        node; "pvs" is principal variation search, which searches the first
+        move of a node with the full window and the others with a null window
+        that only proves they are not better, searching them again with the
+        full window when they are (see SEARCH_MODES).
+
+    aspiration_window : float (optional)
+        Start each iteration after the first with the window of this
+        half-width centred on the value of the previous iteration, searching
+        again with a window widened on the failing side (by twice as much
+        every time) when the value falls outside; 0 searches every iteration
+        with the full window.
+
+    See IsolationPlayer for the remaining parameters.
     """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, tt_size=TT_SIZE, move_ordering=True,
+                 opening_book=None, symmetry_plies=0, batch_scoring=True,
+                 ponder=False, time_management=True, search_mode="alphabeta",
+                 aspiration_window=0., tt_megabytes=None):
+        IsolationPlayer.__init__(self, search_depth, score_fn, timeout, in_place)
+        if search_mode not in SEARCH_MODES:
+            raise ValueError("Unknown search mode: {}".format(search_mode))
+        self.search_mode = search_mode
+        self.aspiration_window = aspiration_window
+        self.root_value = None
+        self.time_manager = TimeManager() if time_management else None
+        self.batch_scoring = batch_scoring
+        self.ponder = ponder
+        self._ponder_thread = None
+        self._ponder_stop = None
+        if tt_megabytes is not None:
+            self.tt = TranspositionTable.from_megabytes(tt_megabytes)
+        else:
+            self.tt = TranspositionTable(tt_size) if tt_size else None
+        self.opening_book = opening_book
+        self.symmetry_plies = symmetry_plies
+        self.move_ordering = move_ordering
+        self.killers = []
+        self.history = {}
+        self.best_move = None
+        self.partial_move = None
+        self.root_depth = 0
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -414,26 +708,136 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
+        self.stop_pondering()
         self.time_left = time_left
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
         best_move = (-1, -1)
 
+        # table entries are only valid for the perspective of this call,
+        # unless they were stored by pondering on the opponent's time
+        if self.tt is not None:
+            if self.ponder:
+                self.tt.new_search()
+                self.tt.reset_counters()
+            else:
+                self.tt.clear()
+
+        # the move ordering heuristics are shared by all the iterations
+        self.stats = SearchStats()
+        self.killers = []
+        self.history = {}
+        self.best_move = None
+        self.root_value = None
+
+        # the pondering search may have stored the best move of this state
+        if self.ponder and self.tt is not None:
+            _, _, self.best_move = self.tt_probe(game, 0, float("-inf"), float("inf"))
+
+        # play the book move without searching if the position is known
+        if self.opening_book is not None:
+            book_move = self.opening_book.lookup(game)
+            if book_move is not None and book_move in game.get_legal_moves():
+                return book_move
+
+        # separated endgames are solved exactly without searching
+        endgame_move = endgame.best_move(game)
+        if endgame_move is not None:
+            return endgame_move
+
+        if self.time_manager is not None:
+            self.time_manager.start(time_left, self.TIMER_THRESHOLD)
+
         try:
+            # deeper iterations than the number of blank cells cannot
+            # reach any new game state
+            max_depth = len(game.get_blank_spaces())
             depth = 1
-            while True:
+            while depth <= max_depth:
                 # The try/except block will automatically catch the exception
                 # raised when the timer is about to expire.
-                best_move = self.alphabeta(game, depth)
+                nodes = self.stats.nodes
+                self.partial_move = None
+                if self.aspiration_window and self.root_value is not None:
+                    best_move = self.aspiration_search(game, depth)
+                else:
+                    best_move = self.alphabeta(game, depth)
+                self.best_move = best_move
+                self.stats.depth = depth
+                self.stats.iteration_nodes.append(self.stats.nodes - nodes)
                 depth += 1
 
+                if self.time_manager is not None and not \
+                        self.time_manager.next_iteration(best_move, self.stats.iteration_nodes):
+                    break
+
         except SearchTimeout:
-            return best_move  # return the best move, found so far
+            # the unfinished iteration still improves on the last one once
+            # it has searched the best move of the last one
+            if self.partial_move is not None:
+                best_move = self.partial_move
 
-        # Return the best move from the last completed search iteration
+        self.start_pondering(game, best_move)
         return best_move
 
+    def __getstate__(self):
+        state = IsolationPlayer.__getstate__(self)
+        state.update(_ponder_thread=None, _ponder_stop=None)
+        return state
+
+    def search_summary(self):
+        summary = IsolationPlayer.search_summary(self)
+        summary["tt_hit_rate"] = self.tt.hit_rate() if self.tt is not None else None
+        if self.time_manager is not None:
+            summary["skipped_iteration"] = self.time_manager.skipped
+        return summary
+
+    def start_pondering(self, game, move):
+        """Start searching the position after `move` in a background thread
+        if pondering is enabled and the game is not over after `move`.
+        """
+        if not self.ponder or self.tt is None or move == (-1, -1):
+            return
+        game = game.forecast_move(move)
+        if not game.get_legal_moves():
+            return
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(
+            target=self.ponder_search, args=(game, self._ponder_stop), daemon=True)
+        self._ponder_thread.start()
+
+    def stop_pondering(self):
+        """Stop the pondering search, if any, and wait for the thread to end. """
+        if self._ponder_thread is not None:
+            self._ponder_stop.set()
+            self._ponder_thread.join()
+            self._ponder_thread = None
+
+    def ponder_search(self, game, stop):
+        """
+        Helper method for pondering. Searches the game state reached by the
+        agent's move, where the opponent is to move, with iterative deepening
+        until `stop` is set, PONDER_TIMEOUT seconds have passed or the whole
+        game tree has been searched, storing the results in the transposition
+        table.
+        """
+        if stop.wait(PONDER_DELAY):
+            return
+        self.stats = SearchStats()
+        self.killers = []
+        self.history = {}
+        deadline = time.monotonic() + PONDER_TIMEOUT
+        self.time_left = lambda: (float("-inf") if stop.is_set() or time.monotonic() > deadline
+                                  else float("inf"))
+        try:
+            for depth in range(1, len(game.get_blank_spaces()) + 1):
+                self.root_depth = depth
+                self.min_value(game, depth, float("-inf"), float("inf"))
+                self.stats.depth = depth
+        except SearchTimeout:
+            pass
+
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
@@ -479,41 +883,380 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
+        best_move, self.root_value = self.search_root(game, depth, alpha, beta)
+        return best_move
+
+    def aspiration_search(self, game, depth):
+        """
+        Helper method for iterative deepening. Searches the root with an
+        aspiration window centred on the value of the previous iteration, and
+        searches again with a wider window until the value falls inside it.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+        depth : int
+            Depth is an integer representing the maximum number of plies to
+            search in the game tree before aborting
+
+        Returns
+        -------
+        (int, int)
+            The board coordinates of the best move found in the search
+        """
+        # a decided game has no window to centre on
+        if abs(self.root_value) == float("inf"):
+            return self.alphabeta(game, depth)
+
+        delta = self.aspiration_window
+        alpha, beta = self.root_value - delta, self.root_value + delta
+        while True:
+            best_move, value = self.search_root(game, depth, alpha, beta)
+            if alpha < value < beta or (value <= alpha and alpha == float("-inf")) \
+                    or (value >= beta and beta == float("inf")):
+                self.root_value = value
+                return best_move
+
+            # the search failed low (every move is worse than the window) or
+            # high (the best move is better than the window); the search is
+            # fail-soft, so the value bounds the actual value
+            delta *= 2
+            self.stats.researches += 1
+            if value <= alpha:
+                # every score was an upper bound, so the best move of the
+                # pass is arbitrary and must not replace the previous one
+                self.partial_move = None
+                alpha = value - delta
+            else:
+                beta = value + delta
+                self.best_move = best_move
+
+    def search_root(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+        """
+        Helper method for alpha-beta search. Implements the root level of the
+        search, returning both the best move and its value.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+        depth : int
+            Depth is an integer representing the maximum number of plies to
+            search in the game tree before aborting
+        alpha : float
+            Alpha limits the lower bound of search on minimizing layers
+        beta : float
+            Beta limits the upper bound of search on maximizing layers
+
+        Returns
+        -------
+        ((int, int), float)
+            The board coordinates of the best move found in the current search
+            ((-1, -1) if there are no legal moves) and its value
+        """
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
         # if there is no legal moves left - return (-1, -1)
         if not game.get_legal_moves():
-            return (-1, -1)
+            return (-1, -1), float("-inf")
 
         # if the game just started - select center position
         if game.move_count == 0:
-            return (int(game.height / 2), int(game.width / 2))
+            return (int(game.height / 2), int(game.width / 2)), 0.
 
         # we could prune nodes also at the beginning.
-        # so we start max_value loop here, additionally saving the best move
+        # so we start max_value loop here, additionally saving the best move.
+        # The first move stays the best move if every move loses, so that the
+        # agent never forfeits while it still has legal moves.
+        self.root_depth = depth
+        window = (alpha, beta)
+        moves = self.order_moves(game, game.get_legal_moves(), depth, self.best_move)
+        leaf_scores = self.leaf_scores(game, moves) if depth <= 1 else None
         highest_score = float("-inf")
-        best_move = (-1, -1)
-        for move in game.get_legal_moves():
-            if depth <= 1:
-                score = self.score(game.forecast_move(move), self)
+        best_move = moves[0]
+        # the best move of the iteration so far becomes usable when a timeout
+        # interrupts the search, once the previous best move has been searched
+        track_partial = moves[0] == self.best_move
+        for index, move in enumerate(moves):
+            if leaf_scores is not None:
+                self.stats.nodes += 1
+                score = leaf_scores[index]
+            elif depth <= 1:
+                score = self.search_child(game, move, self.score, self)
+            elif self.search_mode == "pvs":
+                score = self.pvs_child(game, move, depth, alpha, beta, index > 0)
             else:
-                score = self.min_value(game.forecast_move(move), depth - 1, alpha, beta)
+                score = self.search_child(game, move, self.min_value, depth - 1, alpha, beta)
 
             # save the new highest score and a move as a best move
             if highest_score < score:
                 highest_score = score
                 best_move = move
 
+            if track_partial:
+                self.partial_move = best_move
+
             # return score if it greater or equal to beta - we can skip the subtree of a node
             if highest_score >= beta:
-                return best_move
+                return best_move, highest_score
 
             # update alpha only of we're not at the last level
             if depth > 1:
                 alpha = max(alpha, highest_score)
 
-        return best_move
+        key = self.tt_key(game) if self.tt is not None else None
+        self.tt_save(game, key, depth, highest_score, window[0], window[1], best_move)
+        return best_move, highest_score
+
+    def pvs(self, game, depth, alpha, beta):
+        """
+        Helper method for principal variation search. Implements a negamax
+        node: values are from the point of view of the active player, so
+        that a node of the opponent returns the negated value of the same
+        node searched by min_value(). Every move after the first is searched
+        with a null window (see pvs_child).
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+        depth : int
+            Current depth is an to search in the game tree before aborting
+        alpha : float
+            Alpha limits the lower bound of the value for the active player
+        beta : float
+            Beta limits the upper bound of the value for the active player
+
+        Returns
+        -------
+        (float)
+            -inf if the game is over, otherwise the maximum value over all
+            legal child nodes for the active player
+        """
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+
+        if self.is_game_over(game):
+            return float("-inf")
+
+        # the transposition table stores values from the agent's point of view
+        sign = 1 if game.active_player == self else -1
+        window = (alpha, beta) if sign > 0 else (-beta, -alpha)
+        key, value, hash_move = self.tt_probe(game, depth, *window)
+        if value is not None:
+            return sign * value
+
+        highest_score = float("-inf")
+        best_move = None
+        moves = self.order_moves(game, game.get_legal_moves(), depth, hash_move)
+        leaf_scores = self.leaf_scores(game, moves) if depth <= 1 else None
+        for index, move in enumerate(moves):
+            if leaf_scores is not None:
+                self.stats.nodes += 1
+                score = sign * leaf_scores[index]
+            elif depth <= 1:
+                score = sign * self.search_child(game, move, self.score, self)
+            else:
+                score = self.pvs_child(game, move, depth, alpha, beta, index > 0)
+
+            if best_move is None or score > highest_score:
+                highest_score = score
+                best_move = move
+
+            if highest_score >= beta:
+                self.record_cutoff(game, move, depth, index)
+                break
+
+            if depth > 1:
+                alpha = max(alpha, highest_score)
+
+        self.tt_save(game, key, depth, sign * highest_score, window[0], window[1], best_move)
+        return highest_score
+
+    def pvs_child(self, game, move, depth, alpha, beta, null_window):
+        """
+        Helper method for principal variation search. Searches the successor
+        of a game state reached by a move and returns its value for the
+        active player of the game state.
+
+        A null window search only tells whether the move is better than
+        alpha; the move is searched again with the full window when it is
+        (and is not already known to produce a cutoff). Without a finite
+        alpha there is no null window, so the first move of a node and the
+        moves searched while every move so far loses use the full window, as
+        do the moves of nodes that are themselves searched with a null window.
+        """
+        if null_window and alpha > float("-inf") and beta - alpha > NULL_WINDOW:
+            score = -self.search_child(game, move, self.pvs, depth - 1,
+                                       -alpha - NULL_WINDOW, -alpha)
+            if not alpha < score < beta:
+                return score
+            self.stats.researches += 1
+        return -self.search_child(game, move, self.pvs, depth - 1, -beta, -alpha)
+
+    def leaf_scores(self, game, moves):
+        """
+        Helper method for alpha-beta search. Returns the scores of all the
+        children of a node at the last ply computed by the batched version of
+        the heuristic (see batch_score_fn()), or None if batch scoring is
+        disabled or not available for the heuristic or the board.
+        """
+        batch_fn = batch_score_fn(self.score) if self.batch_scoring else None
+        return batch_fn(game, moves, self) if batch_fn is not None else None
+
+    def tt_key(self, game):
+        """
+        Helper method for alpha-beta search. Returns the key of the current
+        game state in the transposition table: a (hash, transform) pair where
+        the transform maps the state onto its canonical representative, or is
+        None if the hash is `game.hash()` itself.
+        """
+        if game.move_count < self.symmetry_plies:
+            return board_symmetry(game.width, game.height).canonical(game)
+        return game.hash(), None
+
+    def tt_probe(self, game, depth, alpha, beta):
+        """
+        Helper method for alpha-beta search. Looks up the current game state
+        in the transposition table.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+        depth : int
+            Current depth is an to search in the game tree before aborting
+        alpha : float
+            Alpha limits the lower bound of search on minimizing layers
+        beta : float
+            Beta limits the upper bound of search on maximizing layers
+
+        Returns
+        -------
+        ((int, int), float, (int, int))
+            The key of the game state (None if the table is disabled), the
+            stored value if an entry searched at least `depth` plies decides
+            the node within the (alpha, beta) window (otherwise None), and the
+            stored best move (None if the state is not in the table)
+        """
+        if self.tt is None:
+            return None, None, None
+
+        key = self.tt_key(game)
+        entry = self.tt.probe(key[0])
+        if entry is None:
+            return key, None, None
+
+        entry_depth, value, flag, move = entry
+        if key[1] is not None:
+            move = board_symmetry(game.width, game.height).from_canonical(move, key[1])
+        if entry_depth >= depth and (
+                flag == EXACT or
+                (flag == LOWER and value >= beta) or
+                (flag == UPPER and value <= alpha)):
+            return key, value, move
+        return key, None, move
+
+    def order_moves(self, game, moves, depth, hash_move):
+        """
+        Helper method for alpha-beta search. Sorts the legal moves of a node
+        so that the moves most likely to produce a cutoff are searched first:
+        the hash move (best move of the previous iteration), then the killer
+        moves of the current ply, then the rest by decreasing history score.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+        moves : list<(int, int)>
+            The legal moves of the active player
+        depth : int
+            Current depth is an to search in the game tree before aborting
+        hash_move : (int, int) or None
+            The best move previously found for the game state
+
+        Returns
+        -------
+        list<(int, int)>
+            The legal moves in search order
+        """
+        if not self.move_ordering:
+            return moves
+
+        ply = self.root_depth - depth
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history
+        maximizing = game.active_player == self
+
+        def priority(move):
+            if move == hash_move:
+                return (2, 0)
+            if move in killers:
+                return (1, 0)
+            return (0, history.get((maximizing, move), 0))
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def record_cutoff(self, game, move, depth, index):
+        """
+        Helper method for alpha-beta search. Updates the search statistics,
+        killer moves and history scores after `move` produced a cutoff.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+        move : (int, int)
+            The move that produced the cutoff
+        depth : int
+            Current depth is an to search in the game tree before aborting
+        index : int
+            The position of the move in the search order of the node
+        """
+        self.stats.cutoffs += 1
+        if index == 0:
+            self.stats.first_move_cutoffs += 1
+        if not self.move_ordering:
+            return
+
+        ply = self.root_depth - depth
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+        key = (game.active_player == self, move)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def tt_save(self, game, key, depth, value, alpha, beta, move):
+        """
+        Helper method for alpha-beta search. Stores the result of searching a
+        game state, with the bound type implied by the (alpha, beta) window
+        the state was searched with. Moves of states keyed by their canonical
+        key are stored in the canonical frame.
+        """
+        if key is None:
+            return
+        key, transform = key
+        if transform is not None and move is not None:
+            move = board_symmetry(game.width, game.height).to_canonical(move, transform)
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, value, flag, move)
 
     def is_game_over(self, game):
         """
@@ -561,23 +1304,38 @@ class AlphaBetaPlayer(IsolationPlayer):
         if self.is_game_over(game):
             return float("inf")
 
+        key, value, hash_move = self.tt_probe(game, depth, alpha, beta)
+        if value is not None:
+            return value
+
+        window = (alpha, beta)
         lowest_score = float("inf")
-        for move in game.get_legal_moves():
-            if depth <= 1:
-                lowest_score = min(lowest_score, self.score(game.forecast_move(move), self))
+        best_move = None
+        moves = self.order_moves(game, game.get_legal_moves(), depth, hash_move)
+        leaf_scores = self.leaf_scores(game, moves) if depth <= 1 else None
+        for index, move in enumerate(moves):
+            if leaf_scores is not None:
+                self.stats.nodes += 1
+                score = leaf_scores[index]
+            elif depth <= 1:
+                score = self.search_child(game, move, self.score, self)
             else:
-                lowest_score = min(
-                    lowest_score,
-                    self.max_value(game.forecast_move(move), depth - 1, alpha, beta))
+                score = self.search_child(game, move, self.max_value, depth - 1, alpha, beta)
 
-            # return score if it less or equal to alpha - we can skip the subtree of a node
+            if best_move is None or score < lowest_score:
+                lowest_score = score
+                best_move = move
+
+            # stop if the score is less or equal to alpha - we can skip the subtree of a node
             if lowest_score <= alpha:
-                return lowest_score
+                self.record_cutoff(game, move, depth, index)
+                break
 
             # update beta only of we're not at the last level
             if depth > 1:
                 beta = min(beta, lowest_score)
 
+        self.tt_save(game, key, depth, lowest_score, window[0], window[1], best_move)
         return lowest_score
 
     def max_value(self, game, depth, alpha, beta):
@@ -604,21 +1362,36 @@ class AlphaBetaPlayer(IsolationPlayer):
         if self.is_game_over(game):
             return float("-inf")
 
+        key, value, hash_move = self.tt_probe(game, depth, alpha, beta)
+        if value is not None:
+            return value
+
+        window = (alpha, beta)
         highest_score = float("-inf")
-        for move in game.get_legal_moves():
-            if depth <= 1:
-                highest_score = max(highest_score, self.score(game.forecast_move(move), self))
+        best_move = None
+        moves = self.order_moves(game, game.get_legal_moves(), depth, hash_move)
+        leaf_scores = self.leaf_scores(game, moves) if depth <= 1 else None
+        for index, move in enumerate(moves):
+            if leaf_scores is not None:
+                self.stats.nodes += 1
+                score = leaf_scores[index]
+            elif depth <= 1:
+                score = self.search_child(game, move, self.score, self)
             else:
-                highest_score = max(
-                    highest_score,
-                    self.min_value(game.forecast_move(move), depth - 1, alpha, beta))
+                score = self.search_child(game, move, self.min_value, depth - 1, alpha, beta)
 
-            # return score if it greater or equal to beta - we can skip the subtree of a node
+            if best_move is None or score > highest_score:
+                highest_score = score
+                best_move = move
+
+            # stop if the score is greater or equal to beta - we can skip the subtree of a node
             if highest_score >= beta:
-                return highest_score
+                self.record_cutoff(game, move, depth, index)
+                break
 
             # update alpha only of we're not at the last level
             if depth > 1:
                 alpha = max(alpha, highest_score)
 
+        self.tt_save(game, key, depth, highest_score, window[0], window[1], best_move)
         return highest_score
@@ -0,0 +1,331 @@
+"""
+This file contains the `BitBoard` class, an alternative engine for the game
+Isolation that keeps the blocked cells in an arbitrary-precision integer
+bitmask instead of a Python list.
+
+`BitBoard` exposes the same public interface as `isolation.Board`, so any
+agent or script written against `Board` (e.g., `AlphaBetaPlayer` or
+`tournament.py`) can use it unchanged.  Cells are numbered exactly as in
+`Board` (index = row + column * height), and bit `idx` of the blocked mask is
+set once a player has occupied cell `idx`.
+"""
+import random
+
+from .isolation import Board, zobrist_keys
+
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+_TABLES = {}
+
+
+def move_tables(width, height):
+    """Return the precomputed lookup tables for a board geometry.
+
+    The tables are built once per (width, height) pair and shared by every
+    board with the same dimensions.
+
+    Returns
+    -------
+    (tuple, tuple, tuple)
+        cells : the (row, column) coordinate pair of each cell index
+        masks : the knight-move bitmask of each cell index
+        neighbors : the (bit, (row, column)) pairs of each cell index, in
+            the same order `Board` generates moves
+    """
+    key = (width, height)
+    if key not in _TABLES:
+        cells = tuple((idx % height, idx // height)
+                      for idx in range(width * height))
+        masks = []
+        neighbors = []
+        for r, c in cells:
+            mask = 0
+            cell_neighbors = []
+            for dr, dc in DIRECTIONS:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    bit = 1 << ((r + dr) + (c + dc) * height)
+                    mask |= bit
+                    cell_neighbors.append((bit, (r + dr, c + dc)))
+            masks.append(mask)
+            neighbors.append(tuple(cell_neighbors))
+        _TABLES[key] = (cells, tuple(masks), tuple(neighbors))
+    return _TABLES[key]
+
+
+class BitBoard(Board):
+    """Implement the game Isolation with integer bitmasks as the state
+    representation.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        self._cells, self._masks, self._neighbors = move_tables(width, height)
+        self._full = (1 << (width * height)) - 1
+        self._blocked = 0
+        # cell index of each player (player 1, player 2), None if not moved
+        self._locs = [Board.NOT_MOVED, Board.NOT_MOVED]
+        # initiative (0 for player 1, 1 for player 2)
+        self._turn = 0
+
+        # previous player locations and hashes saved by push_move()
+        self._undo_stack = []
+
+        # incrementally updated Zobrist hash of the state
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._zobrist = 0
+
+    def hash(self):
+        """Return the Zobrist hash of the current state; BitBoard and Board
+        produce identical hashes for identical states.
+        """
+        return self._zobrist
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = BitBoard(self._player_1, self._player_2,
+                             width=self.width, height=self.height)
+        new_board.move_count = self.move_count
+        new_board._active_player = self._active_player
+        new_board._inactive_player = self._inactive_player
+        new_board._blocked = self._blocked
+        new_board._locs = self._locs[:]
+        new_board._turn = self._turn
+        new_board._zobrist = self._zobrist
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not self._blocked >> (move[0] + move[1] * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self._unpack(self._full & ~self._blocked)
+
+    def get_blank_mask(self):
+        """Return the locations that are still available on the board as an
+        integer bitmask, where bit `row + column * height` is set for each
+        blank cell.
+        """
+        return self._full & ~self._blocked
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        idx = self._locs[self._slot(player)]
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._cells[idx]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._locs[self._slot(player)]
+        if idx == Board.NOT_MOVED:
+            return self.get_blank_spaces()
+
+        blocked = self._blocked
+        valid_moves = [move for bit, move in self._neighbors[idx]
+                       if not blocked & bit]
+        random.shuffle(valid_moves)
+        return valid_moves
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        blocked_keys, location_keys, side_key = self._zobrist_keys
+        player_keys = location_keys[self._turn]
+        if self._locs[self._turn] != Board.NOT_MOVED:
+            self._zobrist ^= player_keys[self._locs[self._turn]]
+        self._zobrist ^= player_keys[idx] ^ blocked_keys[idx] ^ side_key
+        self._locs[self._turn] = idx
+        self._blocked |= 1 << idx
+        self._turn ^= 1
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def push_move(self, move):
+        """Apply a move to the current game in-place, and remember how to
+        revert it with `pop_move()`.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self._undo_stack.append((self._locs[self._turn], self._zobrist))
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Revert the last move applied with `push_move()`. """
+        self._turn ^= 1
+        self._blocked &= ~(1 << self._locs[self._turn])
+        self._locs[self._turn], self._zobrist = self._undo_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self._has_moves()
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self._has_moves()
+
+    def utility(self, player):
+        """Returns the utility of the current game state from the perspective
+        of the specified player.
+
+                    /  +infinity,   "player" wins
+        utility =  |   -infinity,   "player" loses
+                    \\          0,    otherwise
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the utility for the active player on the board.
+
+        Returns
+        ----------
+        float
+            The utility value of the current game state for the specified
+            player. The game has a utility of +inf if the player has won,
+            a value of -inf if the player has lost, and a value of 0
+            otherwise.
+        """
+        if not self._has_moves():
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                idx = i + j * self.height
+                if not self._blocked >> idx & 1:
+                    out += ' '
+                elif self._locs[0] == idx:
+                    out += symbols[0]
+                elif self._locs[1] == idx:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
+
+    def _slot(self, player):
+        """Return the state index (0 for player 1, 1 for player 2) of the
+        specified player.
+        """
+        if player == self._player_1:
+            return 0
+        elif player == self._player_2:
+            return 1
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _has_moves(self):
+        """Test whether the active player has at least one legal move. """
+        idx = self._locs[self._turn]
+        if idx == Board.NOT_MOVED:
+            return self._blocked != self._full
+        return bool(self._masks[idx] & ~self._blocked)
+
+    def _unpack(self, mask):
+        """Convert a bitmask of cells into a list of (row, column) pairs in
+        index order.
+        """
+        cells = self._cells
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(cells[low.bit_length() - 1])
+            mask ^= low
+        return moves
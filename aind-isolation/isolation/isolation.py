@@ -13,6 +13,37 @@ from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# seed of the Zobrist key generator; the keys (and therefore the values
+# returned by Board.hash()) must be identical in every process
+ZOBRIST_SEED = 20170901
+
+_ZOBRIST_KEYS = {}
+
+
+def zobrist_keys(width, height):
+    """Return the Zobrist hashing keys for a board geometry.
+
+    The hash of a game state is the XOR of the keys of its blocked cells, the
+    keys of both player locations and, when player 2 holds the initiative,
+    the side key.  The keys are generated once per (width, height) pair from
+    a fixed seed, so hashes can be stored on disk and compared across runs.
+
+    Returns
+    -------
+    (list<int>, (list<int>, list<int>), int)
+        The blocked-cell keys and the location keys of player 1 and player 2
+        indexed by cell index, and the side-to-move key.
+    """
+    key = (width, height)
+    if key not in _ZOBRIST_KEYS:
+        rng = random.Random(ZOBRIST_SEED)
+        num_cells = width * height
+        blocked = [rng.getrandbits(64) for _ in range(num_cells)]
+        locations = ([rng.getrandbits(64) for _ in range(num_cells)],
+                     [rng.getrandbits(64) for _ in range(num_cells)])
+        _ZOBRIST_KEYS[key] = (blocked, locations, rng.getrandbits(64))
+    return _ZOBRIST_KEYS[key]
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -52,8 +83,19 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # previous player locations and hashes saved by push_move()
+        self._undo_stack = []
+
+        # incrementally updated Zobrist hash of the state
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._zobrist = 0
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the Zobrist hash of the current state. The hash covers the
+        blocked cells, both player locations and the player holding the
+        initiative, and is updated incrementally by apply_move().
+        """
+        return self._zobrist
 
     @property
     def active_player(self):
@@ -97,6 +139,7 @@ class Board(object):
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
         new_board._board_state = copy(self._board_state)
+        new_board._zobrist = self._zobrist
         return new_board
 
     def forecast_move(self, move):
@@ -118,6 +161,35 @@ class Board(object):
         new_board.apply_move(move)
         return new_board
 
+    def push_move(self, move):
+        """Apply a move to the current game in-place, and remember how to
+        revert it with `pop_move()`.
+
+        Searching with push_move()/pop_move() pairs avoids copying the board
+        for every node; use forecast_move() when an independent copy of the
+        successor state is required.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        self._undo_stack.append((self._board_state[-last_move_idx], self._zobrist))
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Revert the last move applied with `push_move()`, restoring the
+        location of the player that made it and giving it back the initiative.
+        """
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        self._board_state[self._board_state[-last_move_idx]] = Board.BLANK
+        self._board_state[-last_move_idx], self._zobrist = self._undo_stack.pop()
+        self._board_state[-3] ^= 1
+        self.move_count -= 1
+
     def move_is_legal(self, move):
         """Test whether a move is legal in the current game state.
 
@@ -142,6 +214,17 @@ class Board(object):
         return [(i, j) for j in range(self.width) for i in range(self.height)
                 if self._board_state[i + j * self.height] == Board.BLANK]
 
+    def get_blank_mask(self):
+        """Return the locations that are still available on the board as an
+        integer bitmask, where bit `row + column * height` is set for each
+        blank cell.
+        """
+        mask = 0
+        for idx, value in enumerate(self._board_state[:self.width * self.height]):
+            if value == Board.BLANK:
+                mask |= 1 << idx
+        return mask
+
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
 
@@ -201,6 +284,11 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        blocked_keys, location_keys, side_key = self._zobrist_keys
+        player_keys = location_keys[last_move_idx - 1]
+        if self._board_state[-last_move_idx] != Board.NOT_MOVED:
+            self._zobrist ^= player_keys[self._board_state[-last_move_idx]]
+        self._zobrist ^= player_keys[idx] ^ blocked_keys[idx] ^ side_key
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
@@ -295,16 +383,25 @@ class Board(object):
 
         return out
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, trace=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
+        Each player receives its own copy of the game, so agents that search
+        in-place with push_move()/pop_move() can never corrupt the match.
+
         Parameters
         ----------
         time_limit : numeric (optional)
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        trace : callable (optional)
+            A function called as `trace(game, player, move, time_left)` after
+            every call to get_move(), with the game state before the move is
+            applied and the number of milliseconds left on the player's timer
+            when the move was returned (e.g., `search_trace.TraceWriter`).
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
@@ -326,6 +423,9 @@ class Board(object):
             curr_move = self._active_player.get_move(game_copy, time_left)
             move_end = time_left()
 
+            if trace is not None:
+                trace(self, self._active_player, curr_move, move_end)
+
             if curr_move is None:
                 curr_move = Board.NOT_MOVED
 
@@ -0,0 +1,131 @@
+"""
+This file contains the `BoardSymmetry` class, which maps game states that are
+equivalent under the rotations and reflections of the board onto a single
+canonical key.
+
+A knight's move is still a knight's move after the board is rotated or
+reflected, so symmetric game states have the same value and their best moves
+are the images of each other.  Caches keyed on the canonical key (e.g.,
+transposition tables and opening books) therefore share one entry between up
+to eight positions.  Moves are stored in the canonical frame and mapped back
+to the frame of the actual game with the transform returned by `canonical()`.
+"""
+from functools import reduce
+from operator import xor
+
+from .isolation import zobrist_keys
+
+
+def transforms(width, height):
+    """Return the list of coordinate transforms (row, column) -> (row, column)
+    that map a board with the given geometry onto itself. A square board has
+    eight symmetries, a rectangular board has four. The first transform is
+    always the identity.
+    """
+    result = [lambda r, c: (r, c),
+              lambda r, c: (height - 1 - r, c),
+              lambda r, c: (r, width - 1 - c),
+              lambda r, c: (height - 1 - r, width - 1 - c)]
+    if width == height:
+        result += [lambda r, c: (c, r),
+                   lambda r, c: (width - 1 - c, r),
+                   lambda r, c: (c, height - 1 - r),
+                   lambda r, c: (width - 1 - c, height - 1 - r)]
+    return result
+
+
+class BoardSymmetry:
+    """Canonicalisation of game states for one board geometry.
+
+    The key of a game state under transform `t` is the Zobrist hash of the
+    state with every cell moved by `t`, so the key under the identity
+    transform equals `Board.hash()`; the canonical key is the smallest key
+    over all the transforms.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.transforms = transforms(width, height)
+
+        cells = [(idx % height, idx // height) for idx in range(width * height)]
+        blocked_keys, location_keys, self._side_key = zobrist_keys(width, height)
+
+        # images[t][idx] is the index of the image of cell idx under t, and
+        # the key tables are indexed by cell index in the untransformed game
+        self._images = [[r + c * height for r, c in (t(*cell) for cell in cells)]
+                        for t in self.transforms]
+        self._blocked_keys = [[blocked_keys[i] for i in image] for image in self._images]
+        self._all_blocked = [reduce(xor, keys, 0) for keys in self._blocked_keys]
+        self._location_keys = [([location_keys[0][i] for i in image],
+                                [location_keys[1][i] for i in image])
+                               for image in self._images]
+
+        # the move transforms map (row, column) pairs directly
+        self._forward = [dict((cell, t(*cell)) for cell in cells)
+                         for t in self.transforms]
+        self._backward = [dict((v, k) for k, v in forward.items())
+                          for forward in self._forward]
+
+    def keys(self, game):
+        """Return the key of the game state under every transform. """
+        height = self.height
+        blanks = [r + c * height for r, c in game.get_blank_spaces()]
+
+        # player 1 holds the initiative after an even number of moves
+        if game.move_count % 2 == 0:
+            player_1, player_2 = game.active_player, game.inactive_player
+            side = 0
+        else:
+            player_1, player_2 = game.inactive_player, game.active_player
+            side = self._side_key
+        locations = [game.get_player_location(player_1),
+                     game.get_player_location(player_2)]
+        locations = [None if loc is None else loc[0] + loc[1] * height
+                     for loc in locations]
+
+        result = []
+        for t in range(len(self.transforms)):
+            # the blocked cells are all the cells except the blank ones
+            key = reduce(xor, map(self._blocked_keys[t].__getitem__, blanks),
+                         self._all_blocked[t]) ^ side
+            for slot, loc in enumerate(locations):
+                if loc is not None:
+                    key ^= self._location_keys[t][slot][loc]
+            result.append(key)
+        return result
+
+    def canonical(self, game):
+        """Return the canonical key of the game state, and the index of the
+        transform that maps the game onto its canonical representative.
+        """
+        keys = self.keys(game)
+        key = min(keys)
+        return key, keys.index(key)
+
+    def to_canonical(self, move, transform):
+        """Map a move in the game frame to the canonical frame. """
+        return self._forward[transform].get(move, move)
+
+    def from_canonical(self, move, transform):
+        """Map a move in the canonical frame back to the game frame. """
+        return self._backward[transform].get(move, move)
+
+
+_SYMMETRIES = {}
+
+
+def board_symmetry(width, height):
+    """Return the shared `BoardSymmetry` instance of a board geometry. """
+    key = (width, height)
+    if key not in _SYMMETRIES:
+        _SYMMETRIES[key] = BoardSymmetry(width, height)
+    return _SYMMETRIES[key]
@@ -0,0 +1,506 @@
+"""Learn an evaluation function for the isolation agents from self-play.
+
+The heuristics in game_agent.py are hand-tuned formulas over move counts and
+the distance to the centre of the board.  This module fits the weights of an
+evaluation function to the outcome of games instead, in three steps:
+
+    generate -- play games between `AlphaBetaPlayer` agents on a pool of
+                processes and store the features of every position, from the
+                point of view of both players, together with the outcome of
+                the game for that player as compressed NumPy arrays
+    fit      -- fit a logistic regression or a one-hidden-layer perceptron
+                that predicts the outcome from the features, and export it
+                as a JSON model file
+    bench    -- measure the throughput of the exported evaluator, per state
+                and batched over the children of a node
+
+    python learned_eval.py generate --games 2000 --workers 4 --out games.npz
+    python learned_eval.py fit games.npz --model mlp --out mlp.json
+    python learned_eval.py bench mlp.json
+
+The exported model is a score function: `load_evaluator(path)` returns a
+callable that plugs into `IsolationPlayer(score_fn=...)`.  Its value is the
+predicted log-odds of winning, and it registers a batched version of itself
+in `game_agent.BATCH_SCORES`, which computes the features of all the
+children of a node from the knight-move bitmasks of `isolation.bitboard`
+(see batch_scoring.py) and scores them with one matrix product.
+
+Unlike the agents, this module requires NumPy; nothing else in the project
+imports it.
+"""
+import argparse
+import json
+import random
+import timeit
+import weakref
+
+from functools import partial
+
+import numpy as np
+
+from batch_scoring import children, popcount
+from game_agent import AlphaBetaPlayer, BATCH_SCORES
+from isolation import BitBoard
+from isolation.bitboard import move_tables
+
+# The features of a game state from the point of view of one player; "reach"
+# counts the blank cells the player can reach in two moves
+FEATURES = ["own_moves", "opp_moves", "common_moves", "own_reach",
+            "opp_reach", "own_center", "opp_center", "to_move", "blank"]
+
+SELF_PLAY_GAMES = 200  # number of games played by `generate`
+SELF_PLAY_TIME = 25  # milliseconds per move of the self-play agents
+RANDOM_PLIES = (2, 6)  # range of random moves played before the agents start
+
+
+def reach(moves, open_mask, masks):
+    """Return the bitmask of the blank cells reachable in two moves from the
+    cells of the `moves` bitmask.
+    """
+    reached = 0
+    while moves:
+        low = moves & -moves
+        reached |= masks[low.bit_length() - 1]
+        moves ^= low
+    return reached & open_mask
+
+
+def state_features(open_mask, own, opp, to_move, width, height):
+    """Return the list of FEATURES of a game state.
+
+    Parameters
+    ----------
+    open_mask : int
+        The bitmask of the blank cells
+
+    own, opp : int
+        The cell index of the player whose point of view is scored and of
+        its opponent
+
+    to_move : bool
+        True if `own` is the player to move
+
+    width, height : int
+        The dimensions of the board
+    """
+    cells, masks, _ = move_tables(width, height)
+    center_row, center_col = (height - 1) / 2.0, (width - 1) / 2.0
+    max_dist = max(center_row + center_col, 1.)
+    own_moves = masks[own] & open_mask
+    opp_moves = masks[opp] & open_mask
+    own_row, own_col = cells[own]
+    opp_row, opp_col = cells[opp]
+    return [popcount(own_moves),
+            popcount(opp_moves),
+            popcount(own_moves & opp_moves),
+            popcount(reach(own_moves, open_mask, masks)),
+            popcount(reach(opp_moves, open_mask, masks)),
+            (abs(own_row - center_row) + abs(own_col - center_col)) / max_dist,
+            (abs(opp_row - center_row) + abs(opp_col - center_col)) / max_dist,
+            float(to_move),
+            popcount(open_mask) / (width * height)]
+
+
+def features(game, player):
+    """Return the list of FEATURES of a game state from the point of view of
+    `player`, or None before both players are placed.
+    """
+    own = game.get_player_location(player)
+    opp = game.get_player_location(game.get_opponent(player))
+    if own is None or opp is None:
+        return None
+    height = game.height
+    return state_features(game.get_blank_mask(), own[0] + own[1] * height,
+                          opp[0] + opp[1] * height, player == game.active_player,
+                          game.width, height)
+
+
+class Evaluator:
+    """Base class of the learned score functions.
+
+    Subclasses implement `predict`, which maps an array of feature rows to
+    the predicted log-odds of winning.  Instances are registered in
+    `game_agent.BATCH_SCORES` when they are created (or unpickled in a
+    tournament worker), so that `AlphaBetaPlayer` scores the children of a
+    node with one `batch` call; the registration holds the instance weakly,
+    so it ends when the evaluator is released.
+
+    Parameters
+    ----------
+    mean, std : list<float>
+        The mean and standard deviation of each feature in the training set,
+        used to standardize the features before `predict`.
+    """
+    kind = None
+
+    def __init__(self, mean, std):
+        self.mean = np.asarray(mean, dtype=float)
+        self.std = np.asarray(std, dtype=float)
+        self.register()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.register()
+
+    def register(self):
+        """Register `batch` in BATCH_SCORES without keeping `self` alive. """
+        BATCH_SCORES[self] = partial(type(self).batch, weakref.proxy(self))
+
+    def __call__(self, game, player):
+        """Score a game state like the heuristics of game_agent.py. """
+        if game.is_loser(player):
+            return float("-inf")
+
+        if game.is_winner(player):
+            return float("inf")
+
+        row = features(game, player)
+        if row is None:
+            return 0.
+        return float(self.predict(np.array([row]))[0])
+
+    def batch(self, parent, moves, player):
+        """Score every child of a game state (see `game_agent.score_batch`). """
+        states = children(parent, moves)
+        if states is None:
+            return None
+        mover = player == parent.active_player
+        width, height = parent.width, parent.height
+        scores = [None] * len(states)
+        rows = []
+        for i, (child_open, idx, other, _, other_moves) in enumerate(states):
+            if not other_moves:
+                scores[i] = float("inf") if mover else float("-inf")
+            elif mover:
+                rows.append(state_features(child_open, idx, other, False, width, height))
+            else:
+                rows.append(state_features(child_open, other, idx, True, width, height))
+        if rows:
+            values = iter(self.predict(np.array(rows)).tolist())
+            scores = [next(values) if score is None else score for score in scores]
+        return scores
+
+    def predict(self, rows):
+        raise NotImplementedError
+
+    def to_dict(self):
+        return {"kind": self.kind, "features": FEATURES,
+                "mean": self.mean.tolist(), "std": self.std.tolist()}
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+
+class LinearEvaluator(Evaluator):
+    """Logistic regression over the standardized features. """
+    kind = "linear"
+
+    def __init__(self, mean, std, weights, bias):
+        Evaluator.__init__(self, mean, std)
+        self.weights = np.asarray(weights, dtype=float)
+        self.bias = float(bias)
+
+    def predict(self, rows):
+        return ((rows - self.mean) / self.std) @ self.weights + self.bias
+
+    def to_dict(self):
+        model = Evaluator.to_dict(self)
+        model.update(weights=self.weights.tolist(), bias=self.bias)
+        return model
+
+
+class MLPEvaluator(Evaluator):
+    """Perceptron with one hidden layer of rectified linear units. """
+    kind = "mlp"
+
+    def __init__(self, mean, std, hidden_weights, hidden_bias, weights, bias):
+        Evaluator.__init__(self, mean, std)
+        self.hidden_weights = np.asarray(hidden_weights, dtype=float)
+        self.hidden_bias = np.asarray(hidden_bias, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.bias = float(bias)
+
+    def predict(self, rows):
+        hidden = ((rows - self.mean) / self.std) @ self.hidden_weights + self.hidden_bias
+        return np.maximum(hidden, 0.) @ self.weights + self.bias
+
+    def to_dict(self):
+        model = Evaluator.to_dict(self)
+        model.update(hidden_weights=self.hidden_weights.tolist(),
+                     hidden_bias=self.hidden_bias.tolist(),
+                     weights=self.weights.tolist(), bias=self.bias)
+        return model
+
+
+EVALUATORS = {cls.kind: cls for cls in (LinearEvaluator, MLPEvaluator)}
+
+
+def load_evaluator(path):
+    """Load a model file written by `Evaluator.save` as a score function. """
+    with open(path) as f:
+        model = json.load(f)
+    if model.pop("features") != FEATURES:
+        raise ValueError("{} was trained on different features".format(path))
+    return EVALUATORS[model.pop("kind")](**model)
+
+
+def self_play(spec):
+    """Play one self-play game and return the features of every position
+    from the point of view of both players, the outcome of the game for that
+    player (1 for a win, 0 for a loss) and the move count of each position.
+
+    This function is executed by the worker processes, so the game is
+    described by a picklable (seed, time limit, width, height) tuple.
+    """
+    seed, time_limit, width, height = spec
+    rng = random.Random(seed)
+    random.seed(seed)
+    player_1, player_2 = AlphaBetaPlayer(), AlphaBetaPlayer()
+    game = BitBoard(player_1, player_2, width=width, height=height)
+    for _ in range(rng.randint(*RANDOM_PLIES)):
+        moves = sorted(game.get_legal_moves())
+        if not moves:
+            break
+        game.apply_move(rng.choice(moves))
+
+    rows, players, move_counts = [], [], []
+    while game.get_legal_moves():
+        for player in (player_1, player_2):
+            rows.append(features(game, player))
+            players.append(player)
+            move_counts.append(game.move_count)
+        start = timeit.default_timer()
+        time_left = lambda: time_limit - 1000 * (timeit.default_timer() - start)
+        game.apply_move(game.active_player.get_move(game, time_left))
+
+    # the player left without legal moves loses; games that end during the
+    # random opening are dropped
+    winner = game.inactive_player
+    return (np.array(rows, dtype=np.float32).reshape(-1, len(FEATURES)),
+            np.array([player is winner for player in players], dtype=np.int8),
+            np.array(move_counts, dtype=np.int16))
+
+
+def generate(num_games, seed=0, workers=1, time_limit=SELF_PLAY_TIME,
+             width=7, height=7):
+    """Play `num_games` self-play games on a pool of `workers` processes and
+    return the dataset as a dictionary of arrays (see `self_play`).
+    """
+    specs = [(seed * num_games + i, time_limit, width, height)
+             for i in range(num_games)]
+    if workers > 1:
+        from tournament import make_pool
+        pool = make_pool(workers)
+        try:
+            games = pool.map(self_play, specs)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        games = [self_play(spec) for spec in specs]
+    rows, outcomes, move_counts = zip(*games)
+    return {"features": np.concatenate(rows),
+            "outcome": np.concatenate(outcomes),
+            "move_count": np.concatenate(move_counts)}
+
+
+def save_dataset(path, dataset):
+    np.savez_compressed(path, **dataset)
+
+
+def load_dataset(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def split(dataset, validation=0.1, seed=0):
+    """Split a dataset into a training and a validation set. """
+    order = np.random.default_rng(seed).permutation(len(dataset["outcome"]))
+    cut = int(len(order) * (1 - validation))
+    return ({key: value[order[:cut]] for key, value in dataset.items()},
+            {key: value[order[cut:]] for key, value in dataset.items()})
+
+
+def standardize(rows):
+    mean = rows.mean(axis=0)
+    std = rows.std(axis=0)
+    std[std == 0] = 1.
+    return mean, std, (rows - mean) / std
+
+
+def sigmoid(values):
+    return 1. / (1. + np.exp(-np.clip(values, -30., 30.)))
+
+
+def fit_linear(rows, outcomes, l2=1e-3, iterations=20):
+    """Fit a logistic regression with Newton's method.
+
+    Parameters
+    ----------
+    rows : numpy.ndarray
+        The features of the positions, one row per position
+
+    outcomes : numpy.ndarray
+        The outcome of each position (1 for a win, 0 for a loss)
+
+    l2 : float (optional)
+        The weight of the L2 penalty on the weights
+
+    Returns
+    -------
+    LinearEvaluator
+    """
+    mean, std, x = standardize(rows.astype(float))
+    x = np.hstack([x, np.ones((len(x), 1))])
+    y = outcomes.astype(float)
+    penalty = l2 * len(x) * np.eye(x.shape[1])
+    penalty[-1, -1] = 0.
+    theta = np.zeros(x.shape[1])
+    for _ in range(iterations):
+        p = sigmoid(x @ theta)
+        gradient = x.T @ (p - y) + penalty @ theta
+        hessian = (x * (p * (1 - p))[:, None]).T @ x + penalty
+        step = np.linalg.solve(hessian, gradient)
+        theta -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return LinearEvaluator(mean, std, theta[:-1], theta[-1])
+
+
+def fit_mlp(rows, outcomes, hidden=16, epochs=20, batch_size=256,
+            learning_rate=1e-3, l2=1e-4, seed=0):
+    """Fit a one-hidden-layer perceptron to the logistic loss with Adam.
+
+    See `fit_linear` for the data parameters.
+
+    Returns
+    -------
+    MLPEvaluator
+    """
+    rng = np.random.default_rng(seed)
+    mean, std, x = standardize(rows.astype(float))
+    y = outcomes.astype(float)
+    params = [rng.normal(0., np.sqrt(2. / x.shape[1]), (x.shape[1], hidden)),
+              np.zeros(hidden),
+              rng.normal(0., np.sqrt(1. / hidden), hidden),
+              np.zeros(1)]
+    moments = [(np.zeros_like(p), np.zeros_like(p)) for p in params]
+    beta1, beta2, step = 0.9, 0.999, 0
+    for _ in range(epochs):
+        order = rng.permutation(len(x))
+        for start in range(0, len(x), batch_size):
+            batch = order[start:start + batch_size]
+            xb, yb = x[batch], y[batch]
+            w1, b1, w2, b2 = params
+            pre = xb @ w1 + b1
+            act = np.maximum(pre, 0.)
+            error = (sigmoid(act @ w2 + b2) - yb) / len(xb)
+            grad_pre = np.outer(error, w2) * (pre > 0)
+            grads = [xb.T @ grad_pre + l2 * w1, grad_pre.sum(axis=0),
+                     act.T @ error + l2 * w2, np.array([error.sum()])]
+
+            step += 1
+            for p, g, (m, v) in zip(params, grads, moments):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= learning_rate * (m / (1 - beta1 ** step)) / \
+                    (np.sqrt(v / (1 - beta2 ** step)) + 1e-8)
+    w1, b1, w2, b2 = params
+    return MLPEvaluator(mean, std, w1, b1, w2, b2[0])
+
+
+def log_loss(evaluator, dataset):
+    """Return the log loss and the accuracy of an evaluator on a dataset. """
+    p = sigmoid(evaluator.predict(dataset["features"].astype(float)))
+    y = dataset["outcome"]
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    loss = -np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))
+    return loss, np.mean((p > 0.5) == (y == 1))
+
+
+def benchmark(evaluator, num_positions=200, seed=0):
+    """Return the number of child states scored per second by an evaluator
+    called on each child in turn and by its batched version.
+    """
+    from benchmark import random_positions
+    games = []
+    for position in random_positions(num_positions, seed):
+        game = BitBoard("Player1", "Player2")
+        for move in position:
+            game.apply_move(move)
+        games.append((game, game.get_legal_moves()))
+    count = sum(len(moves) for _, moves in games)
+
+    start = timeit.default_timer()
+    for game, moves in games:
+        for move in moves:
+            evaluator(game.forecast_move(move), "Player1")
+    single = count / (timeit.default_timer() - start)
+
+    start = timeit.default_timer()
+    for game, moves in games:
+        evaluator.batch(game, moves, "Player1")
+    batched = count / (timeit.default_timer() - start)
+    return single, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate self-play data " +
+        "and fit a learned evaluation function for the isolation agents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Play self-play games.")
+    gen.add_argument('--games', type=int, default=SELF_PLAY_GAMES)
+    gen.add_argument('--workers', type=int, default=1)
+    gen.add_argument('--time-limit', type=int, default=SELF_PLAY_TIME,
+                     help="Milliseconds per move of the self-play agents.")
+    gen.add_argument('--seed', type=int, default=0)
+    gen.add_argument('--out', default="games.npz")
+
+    fit = commands.add_parser("fit", help="Fit an evaluator to a dataset.")
+    fit.add_argument('data', help="A dataset written by generate.")
+    fit.add_argument('--model', choices=sorted(EVALUATORS), default="linear")
+    fit.add_argument('--hidden', type=int, default=16)
+    fit.add_argument('--epochs', type=int, default=20)
+    fit.add_argument('--out', default="model.json")
+
+    bench = commands.add_parser("bench", help="Measure evaluator throughput.")
+    bench.add_argument('model', help="A model file written by fit.")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        start = timeit.default_timer()
+        dataset = generate(args.games, args.seed, args.workers, args.time_limit)
+        elapsed = timeit.default_timer() - start
+        save_dataset(args.out, dataset)
+        print("{} positions from {} games in {:.1f}s ({:.0f} positions/s)".format(
+            len(dataset["outcome"]), args.games, elapsed,
+            len(dataset["outcome"]) / elapsed))
+
+    elif args.command == "fit":
+        train, validation = split(load_dataset(args.data))
+        start = timeit.default_timer()
+        if args.model == "linear":
+            evaluator = fit_linear(train["features"], train["outcome"])
+        else:
+            evaluator = fit_mlp(train["features"], train["outcome"],
+                                hidden=args.hidden, epochs=args.epochs)
+        elapsed = timeit.default_timer() - start
+        evaluator.save(args.out)
+        for name, data in (("train", train), ("validation", validation)):
+            loss, accuracy = log_loss(evaluator, data)
+            print("{:<12}{:>8} positions  log loss {:.4f}  accuracy {:.1%}".format(
+                name, len(data["outcome"]), loss, accuracy))
+        print("fitted in {:.1f}s".format(elapsed))
+
+    elif args.command == "bench":
+        single, batched = benchmark(load_evaluator(args.model))
+        print("{:.0f} states/s one at a time, {:.0f} states/s batched".format(
+            single, batched))
+
+
+if __name__ == "__main__":
+    main()
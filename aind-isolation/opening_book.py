@@ -0,0 +1,219 @@
+"""Build and query an opening book for the game Isolation.
+
+The first moves of a game have the largest branching factor (a player that
+has not moved yet may move to any blank cell), so they are the most
+expensive to search during a match.  This module searches them offline
+instead:
+
+    1. every position of the first `plies` moves is enumerated, keeping only
+       one representative of each class of positions that are equivalent
+       under the symmetries of the board (rotations and reflections);
+    2. each position reached after exactly `plies` moves is searched with a
+       fixed-depth alpha-beta search (in parallel with `--workers`);
+    3. the values are backed up to the earlier positions with negamax, which
+       assumes the evaluation function is antisymmetric (a gain for one
+       player is an equal loss for the other), as `custom_score` and
+       `improved_score` are.
+
+The best move of every representative is written to a compact binary file
+indexed by the canonical key of the position (see `isolation.symmetry`), in
+the canonical frame, so that an agent finds its book move with a single
+dictionary lookup and maps it back onto its own board:
+
+    python opening_book.py --plies 4 --depth 4 --workers 8
+
+    book = OpeningBook.load("opening_book.bin")
+    player = AlphaBetaPlayer(opening_book=book)
+"""
+import argparse
+import multiprocessing
+import struct
+import timeit
+
+from isolation import BitBoard
+from isolation.symmetry import board_symmetry
+from game_agent import AlphaBetaPlayer, custom_score
+
+BOOK_FILE = "opening_book.bin"
+BOOK_MAGIC = b"ISOB"
+BOOK_HEADER = struct.Struct("<4sBBI")  # magic, width, height, entry count
+BOOK_ENTRY = struct.Struct("<QH")  # canonical key, move cell index (row * width + col)
+
+
+def replay(history, width, height, players=("Player1", "Player2")):
+    """Return the game reached by playing the moves in `history`. """
+    game = BitBoard(players[0], players[1], width=width, height=height)
+    for move in history:
+        game.apply_move(move)
+    return game
+
+
+class OpeningBook:
+    """A table of precomputed best moves indexed by the canonical key of the
+    positions; the moves are stored in the canonical frame.
+
+    Parameters
+    ----------
+    width : int (optional)
+        The number of columns of the boards the book applies to.
+
+    height : int (optional)
+        The number of rows of the boards the book applies to.
+
+    moves : dict (optional)
+        A mapping from canonical keys to the (row, column) best move in the
+        canonical frame.
+    """
+
+    def __init__(self, width=7, height=7, moves=None):
+        self.width = width
+        self.height = height
+        self.moves = moves if moves is not None else {}
+
+    def __len__(self):
+        return len(self.moves)
+
+    def lookup(self, game):
+        """Return the book move of the game state, or None if the state is
+        not in the book.
+        """
+        if game.width != self.width or game.height != self.height:
+            return None
+        symmetry = board_symmetry(self.width, self.height)
+        key, transform = symmetry.canonical(game)
+        move = self.moves.get(key)
+        if move is None:
+            return None
+        return symmetry.from_canonical(move, transform)
+
+    def save(self, path=BOOK_FILE):
+        """Write the book to a binary file. """
+        with open(path, "wb") as f:
+            f.write(BOOK_HEADER.pack(BOOK_MAGIC, self.width, self.height,
+                                     len(self.moves)))
+            for key, (r, c) in sorted(self.moves.items()):
+                f.write(BOOK_ENTRY.pack(key, r * self.width + c))
+
+    @classmethod
+    def load(cls, path=BOOK_FILE):
+        """Read a book written by `save()`. """
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, width, height, count = BOOK_HEADER.unpack_from(data)
+        if magic != BOOK_MAGIC:
+            raise ValueError("{} is not an isolation opening book.".format(path))
+        moves = {key: divmod(cell, width) for key, cell in
+                 BOOK_ENTRY.iter_unpack(data[BOOK_HEADER.size:
+                                             BOOK_HEADER.size + count * BOOK_ENTRY.size])}
+        return cls(width, height, moves)
+
+
+def search_position(args):
+    """Search a position with fixed-depth alpha-beta search and return the
+    best move and its value for the player to move.
+    """
+    history, depth, width, height, score_fn = args
+    players = (AlphaBetaPlayer(score_fn=score_fn),
+               AlphaBetaPlayer(score_fn=score_fn))
+    game = replay(history, width, height, players)
+    searcher = game.active_player
+    searcher.time_left = lambda: float("inf")
+    return searcher.search_root(game, depth)
+
+
+def enumerate_positions(plies, width, height):
+    """Return, for each ply up to `plies`, a dictionary mapping the canonical
+    key of every class of symmetric positions to the move history of its
+    representative.
+    """
+    symmetry = board_symmetry(width, height)
+    levels = [{symmetry.canonical(replay([], width, height))[0]: []}]
+    for _ in range(plies):
+        level = {}
+        for history in levels[-1].values():
+            game = replay(history, width, height)
+            for move in game.get_legal_moves():
+                game.push_move(move)
+                level.setdefault(symmetry.canonical(game)[0], history + [move])
+                game.pop_move()
+        levels.append(level)
+    return levels
+
+
+def build_book(plies=4, depth=4, width=7, height=7, score_fn=custom_score,
+               workers=1):
+    """Build an opening book covering the first `plies` moves of the game.
+
+    Parameters
+    ----------
+    plies : int
+        Number of moves covered by the book
+
+    depth : int
+        Depth of the alpha-beta search from the positions after `plies`
+        moves; the positions inside the book are searched `depth` plies
+        deeper than the book itself
+
+    workers : int
+        Number of processes searching the positions in parallel
+
+    Returns
+    -------
+    OpeningBook
+    """
+    symmetry = board_symmetry(width, height)
+    levels = enumerate_positions(plies, width, height)
+
+    # search the frontier positions
+    frontier = list(levels[plies].items())
+    tasks = [(history, depth, width, height, score_fn) for _, history in frontier]
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(search_position, tasks, chunksize=16)
+    else:
+        results = list(map(search_position, tasks))
+    values = {key: value for (key, _), (_, value) in zip(frontier, results)}
+
+    # back up the values with negamax and record the best moves
+    book = OpeningBook(width, height)
+    for ply in reversed(range(plies)):
+        level_values = {}
+        for key, history in levels[ply].items():
+            game = replay(history, width, height)
+            best_move, best_value = None, float("-inf")
+            for move in game.get_legal_moves():
+                game.push_move(move)
+                value = -values[symmetry.canonical(game)[0]]
+                game.pop_move()
+                if best_move is None or value > best_value:
+                    best_move, best_value = move, value
+            level_values[key] = best_value
+
+            # store the move in the canonical frame of the position
+            _, transform = symmetry.canonical(game)
+            book.moves[key] = symmetry.to_canonical(best_move, transform)
+        values = level_values
+    return book
+
+
+def main(plies, depth, workers, output):
+    start = timeit.default_timer()
+    book = build_book(plies, depth, workers=workers)
+    book.save(output)
+    print("Wrote {} positions to {} in {:.1f} seconds.".format(
+        len(book), output, timeit.default_timer() - start))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book for " +
+        "7x7 isolation by searching the first moves of the game offline.")
+    parser.add_argument('--plies', type=int, default=4,
+                        help="Number of moves covered by the book.")
+    parser.add_argument('--depth', type=int, default=4,
+                        help="Search depth below the last move of the book.")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help="Number of processes searching in parallel.")
+    parser.add_argument('-o', '--output', default=BOOK_FILE,
+                        help="Path of the opening book file.")
+    args = parser.parse_args()
+    main(args.plies, args.depth, args.workers, args.output)
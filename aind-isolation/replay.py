@@ -0,0 +1,189 @@
+"""Store isolation games as compact replays and summarize them.
+
+A replay store is a directory holding two files:
+
+    moves.bin   -- the moves of every game, one after another; each move is
+                   the index row + col * height of its cell, stored in one
+                   byte (two bytes, little-endian, on boards of more than 255
+                   cells)
+    index.jsonl -- one JSON object per game with the offset and the number of
+                   moves of the game in moves.bin, the board size, the agent
+                   names, the winner (0 for player 1, 1 for player 2), the
+                   reason the game ended and the opening cells of both players
+
+A tournament game of 7x7 isolation takes about 40 bytes of moves.  Since the
+index already holds the outcome, length and opening of every game, the
+summary reads the index alone:
+
+    python tournament.py --replays replays
+    python replay.py replays
+
+`isoviz/display.html?replays=../replays` lists the games of a store from its
+index and only fetches and decodes the moves of the game selected for
+viewing (serve the project directory with `python -m http.server`).
+"""
+import argparse
+import json
+import os
+
+from collections import OrderedDict, defaultdict
+
+MOVES_FILE = "moves.bin"
+INDEX_FILE = "index.jsonl"
+
+# Upper bounds of the game length buckets of the summary (in moves)
+LENGTH_BUCKETS = [10, 20, 30, 40, 50]
+
+
+def move_size(width, height):
+    """Return the number of bytes of one move on a board. """
+    return 1 if width * height <= 255 else 2
+
+
+def encode_moves(moves, width=7, height=7):
+    """Return the moves of a game (a list of (row, column) pairs) as bytes. """
+    size = move_size(width, height)
+    return b"".join((r + c * height).to_bytes(size, "little") for r, c in moves)
+
+
+def decode_moves(data, width=7, height=7):
+    """Return the list of [row, column] moves encoded by `encode_moves`. """
+    size = move_size(width, height)
+    cells = (int.from_bytes(data[i:i + size], "little")
+             for i in range(0, len(data), size))
+    return [[idx % height, idx // height] for idx in cells]
+
+
+class ReplayWriter:
+    """Append games to a replay store, creating it if needed.
+
+    The games of a tournament played on a process pool are recorded by the
+    tournament process from the move histories returned by the workers, so
+    the store has a single writer.
+
+    Parameters
+    ----------
+    path : str
+        The directory of the store.
+    """
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.moves_path = os.path.join(path, MOVES_FILE)
+        self.index_path = os.path.join(path, INDEX_FILE)
+        self.count = len(read_index(path)) if os.path.exists(self.index_path) else 0
+
+    def add(self, moves, names, winner, termination, width=7, height=7):
+        """Append a game to the store.
+
+        Parameters
+        ----------
+        moves : list<(int, int)>
+            The move history of the game (see `isolation.Board.play()`)
+
+        names : (str, str)
+            The names of player 1 and player 2
+
+        winner : int
+            0 if player 1 won the game, 1 if player 2 did
+
+        termination : str
+            The reason the game ended (e.g., "forfeit" or "timeout")
+        """
+        data = encode_moves(moves, width, height)
+        with open(self.moves_path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+
+        record = OrderedDict()
+        record["game"] = self.count
+        record["offset"] = offset
+        record["moves"] = len(moves)
+        record["width"] = width
+        record["height"] = height
+        record["player1"], record["player2"] = names
+        record["winner"] = winner
+        record["termination"] = termination
+        record["opening"] = [r + c * height for r, c in moves[:2]]
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        self.count += 1
+
+
+def read_index(path):
+    """Return the list of index records of a replay store. """
+    with open(os.path.join(path, INDEX_FILE)) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_moves(path, record):
+    """Return the list of [row, column] moves of an indexed game. """
+    size = move_size(record["width"], record["height"])
+    with open(os.path.join(path, MOVES_FILE), "rb") as f:
+        f.seek(record["offset"])
+        data = f.read(record["moves"] * size)
+    return decode_moves(data, record["width"], record["height"])
+
+
+def length_bucket(moves):
+    """Return the label of the game length bucket of a number of moves. """
+    lower = 0
+    for upper in LENGTH_BUCKETS:
+        if moves <= upper:
+            return "{}-{}".format(lower + 1, upper)
+        lower = upper
+    return ">{}".format(lower)
+
+
+def summarize(records):
+    """Aggregate the index records of a replay store.
+
+    Returns
+    -------
+    dict
+        A mapping from each grouping ("opening" -- the cell where player 1
+        was placed, as a (row, column) pair -- and "length" -- the game
+        length bucket) to a dictionary that maps every group to its number
+        of games and the number of games won by player 1.
+    """
+    summary = {"opening": defaultdict(lambda: [0, 0]),
+               "length": defaultdict(lambda: [0, 0])}
+    for record in records:
+        height = record["height"]
+        keys = {"length": length_bucket(record["moves"])}
+        if record["opening"]:
+            cell = record["opening"][0]
+            keys["opening"] = (cell % height, cell // height)
+        for grouping, key in keys.items():
+            counts = summary[grouping][key]
+            counts[0] += 1
+            counts[1] += record["winner"] == 0
+    return summary
+
+
+def print_summary(records, summary):
+    wins = sum(record["winner"] == 0 for record in records)
+    print("\n{} games, player 1 won {:.1%}".format(
+        len(records), wins / len(records) if records else 0.))
+
+    order = {key: idx for idx, key in enumerate(
+        [length_bucket(upper) for upper in LENGTH_BUCKETS] +
+        [length_bucket(LENGTH_BUCKETS[-1] + 1)])}
+    for grouping, title, sort_key in [("opening", "Opening", None),
+                                      ("length", "Length", order.get)]:
+        print("\n{:^12}{:^8}{:^16}".format(title, "Games", "Player 1 wins"))
+        print("-" * 36)
+        for key in sorted(summary[grouping], key=sort_key):
+            games, wins = summary[grouping][key]
+            label = "({}, {})".format(*key) if grouping == "opening" else key
+            print("{:^12}{:^8}{:^16.1%}".format(label, games, wins / games))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the games of a " +
+        "replay store written by tournament.py --replays, by opening move " +
+        "and game length.")
+    parser.add_argument('store', help="The replay store directory.")
+    args = parser.parse_args()
+    records = read_index(args.store)
+    print_summary(records, summarize(records))
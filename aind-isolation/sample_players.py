@@ -7,7 +7,9 @@ own agent and example heuristic functions.
 """
 
 from random import randint
-from game_agent import MinimaxPlayer, AlphaBetaPlayer
+
+import batch_scoring
+from game_agent import MinimaxPlayer, AlphaBetaPlayer, BATCH_SCORES
 
 
 def null_score(game, player):
@@ -101,6 +103,9 @@ def improved_score(game, player):
     return float(own_moves - opp_moves)
 
 
+BATCH_SCORES[improved_score] = batch_scoring.improved_score
+
+
 def center_score(game, player):
     """Outputs a score equal to square of the distance from the center of the
     board to the position of the player.
@@ -0,0 +1,147 @@
+"""Record and summarize per-move search statistics of isolation agents.
+
+`TraceWriter` is a trace hook for `isolation.Board.play()`: after every move
+it appends one JSON object to a log file, with the search statistics that the
+agent reports through its `search_summary()` method (completed depth, nodes,
+cutoffs, transposition table hit rate, ...) and the number of milliseconds
+that were left on the timer, both in total and beyond the agent's
+TIMER_THRESHOLD.  Every record is written with a single append, so the games
+of a tournament played in parallel (`tournament.py --trace FILE`) can share
+one log file.
+
+The summary aggregates a log per agent and per game phase:
+
+    python tournament.py --trace trace.jsonl
+    python search_trace.py trace.jsonl
+"""
+import argparse
+import json
+
+from collections import OrderedDict, defaultdict
+
+PHASES = ["opening", "middlegame", "endgame"]
+
+# (column title, record field, aggregate) of the summary table
+COLUMNS = [("Depth", "depth", "mean"),
+           ("Nodes", "nodes", "mean"),
+           ("Cutoffs", "cutoffs", "mean"),
+           ("TT hits", "tt_hit_rate", "mean"),
+           ("Margin", "margin_ms", "min")]
+
+
+def game_phase(game):
+    """Return the phase of the game from the fraction of blank cells: the
+    opening while more than two thirds of the board is blank, the endgame
+    once less than one third is.
+    """
+    blank = len(game.get_blank_spaces()) / (game.width * game.height)
+    if blank > 2 / 3:
+        return "opening"
+    if blank > 1 / 3:
+        return "middlegame"
+    return "endgame"
+
+
+class TraceWriter:
+    """Trace hook for `Board.play()` that appends one JSON line per move.
+
+    Parameters
+    ----------
+    path : str
+        The log file; records are appended to it.
+
+    names : dict (optional)
+        A mapping from player objects to the agent names used in the log;
+        players missing from the mapping are logged by class name.
+
+    game_id : object (optional)
+        A JSON-serializable identifier of the game stored in every record.
+    """
+
+    def __init__(self, path, names=None, game_id=None):
+        self.path = path
+        self.names = names or {}
+        self.game_id = game_id
+
+    def __call__(self, game, player, move, time_left):
+        record = OrderedDict()
+        record["game"] = self.game_id
+        record["agent"] = self.names.get(player, type(player).__name__)
+        record["player"] = 1 if game.move_count % 2 == 0 else 2
+        record["move_count"] = game.move_count
+        record["phase"] = game_phase(game)
+        record["move"] = list(move) if move is not None else None
+        record["time_left_ms"] = time_left
+        threshold = getattr(player, "TIMER_THRESHOLD", None)
+        record["margin_ms"] = time_left - threshold if threshold is not None else time_left
+        if hasattr(player, "search_summary"):
+            record.update(player.search_summary())
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def read_trace(path):
+    """Return the list of records of a log file. """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records):
+    """Aggregate the records per (agent, phase) pair.
+
+    Returns
+    -------
+    dict
+        A mapping from (agent, phase) pairs to a dictionary holding the number
+        of moves, the number of moves that ran out of time (negative time
+        left) and the aggregate of every field of COLUMNS, or None for fields
+        that no record of the group has.
+    """
+    groups = defaultdict(list)
+    for record in records:
+        groups[(record["agent"], record["phase"])].append(record)
+
+    summary = {}
+    for key, group in groups.items():
+        row = {"moves": len(group),
+               "timeouts": sum(1 for r in group if r["time_left_ms"] < 0)}
+        for _, field, aggregate in COLUMNS:
+            values = [r[field] for r in group if r.get(field) is not None]
+            if not values:
+                row[field] = None
+            elif aggregate == "min":
+                row[field] = min(values)
+            else:
+                row[field] = sum(values) / len(values)
+        summary[key] = row
+    return summary
+
+
+def print_summary(summary):
+    print("\n{:^14}{:^12}{:^8}".format("Agent", "Phase", "Moves") +
+          "".join("{:^10}".format(title) for title, _, _ in COLUMNS) +
+          "{:^10}".format("Timeouts"))
+    print("-" * (34 + 10 * len(COLUMNS) + 10))
+    order = {phase: idx for idx, phase in enumerate(PHASES)}
+    for agent, phase in sorted(summary, key=lambda k: (k[0], order[k[1]])):
+        row = summary[(agent, phase)]
+        cells = []
+        for _, field, _ in COLUMNS:
+            value = row[field]
+            if value is None:
+                cells.append("{:^10}".format("-"))
+            elif field == "tt_hit_rate":
+                cells.append("{:^10.1%}".format(value))
+            else:
+                cells.append("{:^10.1f}".format(value))
+        print("{:^14}{:^12}{:^8}".format(agent, phase, row["moves"]) +
+              "".join(cells) + "{:^10}".format(row["timeouts"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the per-move " +
+        "search statistics logged by tournament.py --trace, per agent and " +
+        "game phase.")
+    parser.add_argument('trace', help="The JSON-lines trace file.")
+    args = parser.parse_args()
+    print_summary(summarize(read_trace(args.trace)))
@@ -0,0 +1,126 @@
+"""Time management for the iterative deepening search of the isolation agents.
+
+Without time management, iterative deepening starts iteration after
+iteration until the timer check raises `SearchTimeout` in the middle of one,
+and every node of the unfinished iteration is wasted.  `TimeManager` predicts
+the cost of the next iteration from the duration of the last one and the
+growth in nodes between the last two (the effective branching factor), and
+stops the search when the next iteration is unlikely to finish in the time
+left.
+
+Positions where the best move changed between the last two iterations are
+critical: the search has not settled on a move yet.  The manager then starts
+the next iteration even when it is predicted to get through a smaller part
+of the work, since the agent can use the best move of a partially searched
+iteration once the previous best move has been searched (see
+`AlphaBetaPlayer.search_root`).
+"""
+
+# Growth of the number of nodes between iterations assumed before two
+# iterations have been completed, and the largest growth the manager believes
+MIN_GROWTH = 1.
+MAX_GROWTH = 8.
+DEFAULT_GROWTH = 3.
+
+# Fraction of the predicted duration of the next iteration that must fit in
+# the time left. The predictions are unbiased but noisy (an iteration takes
+# between 0.4 and 3.3 times its predicted duration in 80% of the cases), so
+# the manager only skips iterations that are unlikely to finish, and even
+# fewer when the best move changed during the last iteration
+STABLE_FRACTION = 0.4
+UNSTABLE_FRACTION = 0.2
+
+
+class TimeManager:
+    """Decide when the iterative deepening search of one move should stop.
+
+    Parameters
+    ----------
+    stable_fraction : float (optional)
+        Fraction of the predicted duration of the next iteration that must
+        fit in the time left to start it.
+
+    unstable_fraction : float (optional)
+        The same fraction when the best move just changed (equal to
+        `stable_fraction` to disable the extension for critical positions).
+
+    Attributes
+    ----------
+    durations : list<float>
+        The duration (in milliseconds) of every completed iteration.
+
+    predicted : float
+        The predicted duration of the iteration after the last completed one.
+
+    skipped : bool
+        True if the search of the last move stopped because the next
+        iteration was predicted not to finish, rather than on a timeout.
+    """
+
+    def __init__(self, stable_fraction=STABLE_FRACTION,
+                 unstable_fraction=UNSTABLE_FRACTION):
+        self.stable_fraction = stable_fraction
+        self.unstable_fraction = unstable_fraction
+        self.time_left = None
+        self.threshold = 0.
+        self.durations = []
+        self.predicted = 0.
+        self.skipped = False
+        self._mark = 0.
+        self._best_move = None
+
+    def start(self, time_left, threshold):
+        """Start managing the search of a move.
+
+        Parameters
+        ----------
+        time_left : callable
+            The timer of the move (see `IsolationPlayer.get_move`)
+
+        threshold : float
+            The time (in milliseconds) at which the search is aborted
+        """
+        self.time_left = time_left
+        self.threshold = threshold
+        self.durations = []
+        self.predicted = 0.
+        self.skipped = False
+        self._mark = time_left()
+        self._best_move = None
+
+    def next_iteration(self, best_move, iteration_nodes):
+        """Record the end of an iteration and return whether the next
+        iteration should be started.
+
+        Parameters
+        ----------
+        best_move : (int, int)
+            The best move found by the completed iteration
+
+        iteration_nodes : list<int>
+            The number of nodes of every completed iteration
+
+        Returns
+        -------
+        bool
+            False if the search should stop and return `best_move`
+        """
+        now = self.time_left()
+        self.durations.append(self._mark - now)
+        self._mark = now
+
+        growth = DEFAULT_GROWTH
+        if len(iteration_nodes) >= 2 and iteration_nodes[-2] > 0:
+            growth = min(MAX_GROWTH, max(MIN_GROWTH,
+                                         iteration_nodes[-1] / iteration_nodes[-2]))
+        self.predicted = self.durations[-1] * growth
+
+        unstable = self._best_move is not None and best_move != self._best_move
+        self._best_move = best_move
+
+        required = self.predicted * (self.unstable_fraction if unstable
+                                     else self.stable_fraction)
+        if required > now - self.threshold:
+            self.skipped = True
+            return False
+        return True
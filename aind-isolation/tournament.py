@@ -10,14 +10,30 @@ The matches are fair because the board is initialized randomly for both
 players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
+
+Use `--workers N` to play the games of each round in parallel on a pool of N
+processes. Every game is played with its own deterministic random seed, so a
+tournament can be reproduced with `--seed`, and each worker process is pinned
+to its own CPU (where supported) so that the per-move timing stays fair.
+
+Use `--trace FILE` to log the search statistics of every move to a JSON-lines
+file, and summarize it with `python search_trace.py FILE`.
+
+Use `--replays DIR` to store the moves of every game in a replay store, view
+them with isoviz and summarize them with `python replay.py DIR`.
 """
+import argparse
 import itertools
+import multiprocessing
+import os
 import random
 import warnings
 
 from collections import namedtuple
 
 from isolation import Board
+from replay import ReplayWriter
+from search_trace import TraceWriter
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
@@ -36,37 +52,111 @@ game_agent.py.
 
 Agent = namedtuple("Agent", ["player", "name"])
 
+# A single game: the two players, the opening moves applied before play
+# starts, the seed of the random number generator used during the game, the
+# names of the two agents, and the trace file of the game (or None)
+GameSpec = namedtuple("GameSpec", ["player_1", "player_2", "opening", "seed",
+                                   "names", "trace"])
+
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+def play_game(spec):
+    """Play a single game and return the index of the winner (0 for player 1,
+    1 for player 2), the reason the game ended and the move history of the
+    game, including the opening moves.
+
+    This function is executed by the worker processes in parallel mode, so
+    it only exchanges picklable values with the tournament process.
+    """
+    random.seed(spec.seed)
+    game = Board(spec.player_1, spec.player_2)
+    for move in spec.opening:
+        game.apply_move(move)
+    trace = None
+    if spec.trace is not None:
+        names = {spec.player_1: spec.names[0], spec.player_2: spec.names[1]}
+        trace = TraceWriter(spec.trace, names, game_id=spec.seed)
+    winner, history, termination = game.play(time_limit=TIME_LIMIT, trace=trace)
+    return (int(winner is spec.player_2), termination,
+            [list(move) for move in spec.opening] + history)
+
+
+def pin_worker(counter, cpus):
+    """Pool initializer that pins each worker process to a different CPU. """
+    with counter.get_lock():
+        idx = counter.value
+        counter.value += 1
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpus[idx % len(cpus)]})
+
+
+def make_pool(workers):
+    """Create a process pool with `workers` processes pinned to the CPUs
+    available to the tournament.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(multiprocessing.cpu_count()))
+    if workers > len(cpus):
+        warnings.warn("Running {} workers on {} CPUs; per-move timing will "
+                      "not be fair.".format(workers, len(cpus)))
+    counter = multiprocessing.Value('i', 0)
+    return multiprocessing.Pool(workers, initializer=pin_worker,
+                                initargs=(counter, cpus))
+
+
+def play_round(cpu_agent, test_agents, win_counts, num_matches, pool=None,
+               trace=None, replays=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+
+    The games are played one after another unless a process pool is given,
+    in which case they are played in parallel by the pool workers. The search
+    statistics of every move are appended to the `trace` file, and the games
+    to the `replays` store (a `replay.ReplayWriter`), if given.
     """
-    timeout_count = 0
-    forfeit_count = 0
+    specs = []
     for _ in range(num_matches):
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
-
         # initialize all games with a random move and response
+        opening = []
+        game = Board(cpu_agent.player, test_agents[0].player)
         for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
+            opening.append(random.choice(game.get_legal_moves()))
+            game.apply_move(opening[-1])
+
+        for agent in test_agents:
+            specs.append(GameSpec(cpu_agent.player, agent.player, opening,
+                                  random.getrandbits(32),
+                                  (cpu_agent.name, agent.name), trace))
+            specs.append(GameSpec(agent.player, cpu_agent.player, opening,
+                                  random.getrandbits(32),
+                                  (agent.name, cpu_agent.name), trace))
+
+    # play all games and tally the results; play_game reseeds the random
+    # number generator, so restore its state afterwards to pick the same
+    # openings in the next round whether or not the games run in parallel
+    state = random.getstate()
+    if pool:
+        results = pool.map(play_game, specs, chunksize=1)
+    else:
+        results = list(map(play_game, specs))
+    random.setstate(state)
 
-        # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
-            win_counts[winner] += 1
+    timeout_count = 0
+    forfeit_count = 0
+    for spec, (winner, termination, history) in zip(specs, results):
+        win_counts[spec[winner]] += 1
+        if replays is not None:
+            replays.add(history, spec.names, winner, termination)
 
-            if termination == "timeout":
-                timeout_count += 1
-            elif termination == "forfeit":
-                forfeit_count += 1
+        if termination == "timeout":
+            timeout_count += 1
+        elif termination == "forfeit":
+            forfeit_count += 1
 
     return timeout_count, forfeit_count
 
@@ -77,7 +167,8 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
+def play_matches(cpu_agents, test_agents, num_matches, pool=None, trace=None,
+                 replays=None):
     """Play matches between the test agent and each cpu_agent individually. """
     total_wins = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
@@ -93,7 +184,8 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        counts = play_round(agent, test_agents, wins, num_matches, pool, trace,
+                            replays)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
         total_wins = update(total_wins, wins)
@@ -124,7 +216,7 @@ def play_matches(cpu_agents, test_agents, num_matches):
                "legal moves available to play.\n").format(total_forfeits))
 
 
-def main():
+def main(workers=1, seed=None, trace=None, replays=None):
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
@@ -149,12 +241,33 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
     ]
 
+    random.seed(seed)
+    replays = ReplayWriter(replays) if replays is not None else None
+
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    if workers > 1:
+        with make_pool(workers) as pool:
+            play_matches(cpu_agents, test_agents, NUM_MATCHES, pool, trace,
+                         replays)
+    else:
+        play_matches(cpu_agents, test_agents, NUM_MATCHES, trace=trace,
+                     replays=replays)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help="Number of processes playing games in parallel.")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed of the random openings and of every game.")
+    parser.add_argument('--trace', default=None,
+                        help="Append the search statistics of every move " +
+                        "to this JSON-lines file.")
+    parser.add_argument('--replays', default=None,
+                        help="Store the moves of every game in this replay " +
+                        "store directory.")
+    args = parser.parse_args()
+    main(args.workers, args.seed, args.trace, args.replays)
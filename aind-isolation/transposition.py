@@ -0,0 +1,128 @@
+"""Bounded transposition table for the isolation search agents.
+
+The table caches the result of searching a game state so that positions
+reached through different move orders -- or searched again by the next
+iteration of iterative deepening -- are not searched twice.  States are
+identified by the Zobrist hash returned by `isolation.Board.hash()`.
+"""
+
+# Flags describing how the stored value relates to the true minimax value
+EXACT = 0  # the value is exact
+LOWER = 1  # the search failed high; the value is a lower bound
+UPPER = 2  # the search failed low; the value is an upper bound
+
+TT_SIZE = 1 << 16  # default number of entries
+
+# Approximate memory used by one occupied slot (the entry tuple and its
+# integers), used to convert a memory budget into a number of entries
+ENTRY_BYTES = 200
+
+
+class TranspositionTable:
+    """Fixed-capacity hash table of search results.
+
+    Every entry is stored in the slot `key % size`, so the memory used by the
+    table never exceeds `size` entries.  When two states compete for the same
+    slot, the replacement policy keeps the entry that was searched deeper,
+    unless the resident entry was stored by an earlier search (see
+    `new_search()`), in which case it is always replaced.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The maximum number of entries held by the table.
+
+    Attributes
+    ----------
+    probes, hits, stores, collisions : int
+        Counters of lookups, successful lookups, stored entries and entries
+        overwritten by a different state.
+    """
+
+    def __init__(self, size=TT_SIZE):
+        if size < 1:
+            raise ValueError("Transposition table size must be positive.")
+        self.size = size
+        self.generation = 0
+        self._slots = [None] * size
+        self.reset_counters()
+
+    @classmethod
+    def from_megabytes(cls, megabytes):
+        """Create a table whose entries fit into the given memory budget. """
+        return cls(max(1, int(megabytes * 2**20) // ENTRY_BYTES))
+
+    def __len__(self):
+        return sum(1 for entry in self._slots if entry is not None)
+
+    def clear(self):
+        """Remove every entry and reset the statistics counters. """
+        self._slots = [None] * self.size
+        self.reset_counters()
+
+    def reset_counters(self):
+        """Reset the statistics counters without removing any entry. """
+        self.probes = self.hits = self.stores = self.collisions = 0
+
+    def new_search(self):
+        """Mark every entry currently in the table as belonging to an older
+        search, making it the first candidate for replacement.
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """Look up the entry stored for a state.
+
+        Parameters
+        ----------
+        key : int
+            The Zobrist hash of the state
+
+        Returns
+        -------
+        (int, float, int, (int, int)) or None
+            The (depth, value, flag, best move) tuple stored for the state, or
+            None if the state is not in the table.
+        """
+        self.probes += 1
+        entry = self._slots[key % self.size]
+        if entry is None or entry[0] != key:
+            return None
+        self.hits += 1
+        return entry[1:5]
+
+    def store(self, key, depth, value, flag, move):
+        """Store the result of searching a state.
+
+        Parameters
+        ----------
+        key : int
+            The Zobrist hash of the state
+
+        depth : int
+            The number of plies searched below the state
+
+        value : float
+            The value returned by the search
+
+        flag : int
+            One of EXACT, LOWER or UPPER
+
+        move : (int, int) or None
+            The best move found in the state
+        """
+        idx = key % self.size
+        entry = self._slots[idx]
+        if entry is not None:
+            if entry[0] != key:
+                if entry[5] == self.generation and entry[1] > depth:
+                    return
+                self.collisions += 1
+            elif entry[5] == self.generation and entry[1] > depth:
+                return
+        self._slots[idx] = (key, depth, value, flag, move, self.generation)
+        self.stores += 1
+
+    def hit_rate(self):
+        """Return the fraction of lookups that found an entry. """
+        return self.hits / self.probes if self.probes else 0.
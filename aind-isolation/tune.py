@@ -0,0 +1,263 @@
+"""Tune the heuristics of the isolation agents with sequential match tests.
+
+tournament.py plays a fixed number of games, which is too few to tell two
+similar heuristics apart and wastes games when the difference is large.
+`sprt` plays fair pairs of games between a test agent and a base agent (the
+same random opening, once with each agent moving first) on a process pool,
+and stops as soon as a sequential probability ratio test accepts one of two
+hypotheses about the Elo difference between them:
+
+    H0: elo = elo0   (the test agent is not stronger)
+    H1: elo = elo1   (the test agent is stronger by elo1)
+
+The test accepts H1 when H0 holds with probability at most `alpha`, and H0
+when H1 holds with probability at most `beta`.  `sweep` runs one test per
+value of a keyword parameter of a heuristic, each against the heuristic with
+its default parameters:
+
+    python tune.py sprt custom_score_2 --base improved_score --workers 4
+    python tune.py sweep custom_score_2 weight 0 0.5 1 --workers 4
+
+Every test appends a JSON line with its outcome to the results file
+(tune_results.jsonl by default).
+"""
+import argparse
+import json
+import math
+import random
+import time
+
+from collections import OrderedDict
+from functools import partial
+
+from isolation import Board
+from sample_players import improved_score, open_move_score, center_score
+from game_agent import (AlphaBetaPlayer, custom_score, custom_score_2,
+                        custom_score_3)
+from tournament import Agent, GameSpec, make_pool, play_game
+
+HEURISTICS = OrderedDict([("improved_score", improved_score),
+                          ("open_move_score", open_move_score),
+                          ("center_score", center_score),
+                          ("custom_score", custom_score),
+                          ("custom_score_2", custom_score_2),
+                          ("custom_score_3", custom_score_3)])
+
+ELO0 = 0.  # Elo difference of the null hypothesis
+ELO1 = 50.  # Elo difference of the alternative hypothesis
+ALPHA = 0.05  # probability of accepting H1 when H0 holds
+BETA = 0.05  # probability of accepting H0 when H1 holds
+MAX_GAMES = 2000  # number of games after which a test is inconclusive
+RESULTS_FILE = "tune_results.jsonl"
+
+
+def expected_score(elo):
+    """Return the expected score of a player `elo` points stronger. """
+    return 1. / (1. + 10. ** (-elo / 400.))
+
+
+def elo_difference(score):
+    """Return the Elo difference that corresponds to an expected score. """
+    score = min(max(score, 1e-6), 1. - 1e-6)
+    return -400. * math.log10(1. / score - 1.)
+
+
+def log_likelihood_ratio(wins, losses, elo0=ELO0, elo1=ELO1):
+    """Return the log-likelihood ratio of H1 against H0 after the given
+    number of wins and losses of the test agent (isolation has no draws).
+    """
+    p0, p1 = expected_score(elo0), expected_score(elo1)
+    return wins * math.log(p1 / p0) + losses * math.log((1. - p1) / (1. - p0))
+
+
+def sprt_bounds(alpha=ALPHA, beta=BETA):
+    """Return the log-likelihood ratios below which the test accepts H0 and
+    above which it accepts H1.
+    """
+    return math.log(beta / (1. - alpha)), math.log((1. - beta) / alpha)
+
+
+def fair_pairs(test, base, num_pairs, rng):
+    """Return the specs of `num_pairs` fair pairs of games between two agents
+    (see `tournament.play_round`), with openings drawn from `rng`.
+    """
+    specs = []
+    for _ in range(num_pairs):
+        opening = []
+        game = Board(test.player, base.player)
+        for _ in range(2):
+            opening.append(rng.choice(game.get_legal_moves()))
+            game.apply_move(opening[-1])
+        specs.append(GameSpec(test.player, base.player, opening,
+                              rng.getrandbits(32), (test.name, base.name), None))
+        specs.append(GameSpec(base.player, test.player, opening,
+                              rng.getrandbits(32), (base.name, test.name), None))
+    return specs
+
+
+def sprt(test, base, elo0=ELO0, elo1=ELO1, alpha=ALPHA, beta=BETA,
+         max_games=MAX_GAMES, pool=None, workers=1, seed=0):
+    """Play fair pairs of games between a test agent and a base agent until
+    the sequential probability ratio test accepts a hypothesis or
+    `max_games` games have been played.
+
+    The games are played in rounds of one pair per worker, and the test is
+    checked after every round, so a test may play up to one round more than
+    it needs.
+
+    Parameters
+    ----------
+    test, base : `tournament.Agent`
+        The agents to compare
+
+    elo0, elo1 : float (optional)
+        The Elo difference of the test agent under H0 and under H1
+
+    alpha, beta : float (optional)
+        The error rates of the test
+
+    max_games : int (optional)
+        The number of games after which the test stops without a decision;
+        must be at least 1
+
+    pool : multiprocessing.Pool (optional)
+        The pool of processes playing the games, or None to play them in the
+        current process
+
+    workers : int (optional)
+        The number of processes of the pool
+
+    seed : int (optional)
+        The seed of the openings and of every game
+
+    Returns
+    -------
+    OrderedDict
+        The outcome of the test: the result ("H1" if the test agent is
+        stronger, "H0" if it is not, "inconclusive" otherwise), the games
+        won and lost by the test agent, the final log-likelihood ratio and
+        its bounds, and the Elo difference estimated from the games with
+        its 95% confidence interval.
+    """
+    if max_games < 1:
+        raise ValueError("An SPRT must play at least one game.")
+    rng = random.Random(seed)
+    lower, upper = sprt_bounds(alpha, beta)
+    wins = losses = timeouts = 0
+    ratio = 0.
+    start = time.time()
+    while wins + losses < max_games and lower < ratio < upper:
+        specs = fair_pairs(test, base, max(workers, 1), rng)
+        results = pool.map(play_game, specs, chunksize=1) if pool else map(play_game, specs)
+        for spec, (winner, termination, _) in zip(specs, results):
+            if spec[winner] is test.player:
+                wins += 1
+            else:
+                losses += 1
+            timeouts += termination == "timeout"
+        ratio = log_likelihood_ratio(wins, losses, elo0, elo1)
+
+    games = wins + losses
+    score = wins / games
+    error = 1.96 * math.sqrt(score * (1. - score) / games)
+    result = "H1" if ratio >= upper else "H0" if ratio <= lower else "inconclusive"
+    return OrderedDict([("test", test.name), ("base", base.name),
+                        ("result", result), ("games", games), ("wins", wins),
+                        ("losses", losses), ("timeouts", timeouts),
+                        ("llr", ratio), ("bounds", [lower, upper]),
+                        ("elo", elo_difference(score)),
+                        ("elo_interval", [elo_difference(score - error),
+                                          elo_difference(score + error)]),
+                        ("elo0", elo0), ("elo1", elo1), ("alpha", alpha),
+                        ("beta", beta), ("seed", seed),
+                        ("seconds", time.time() - start)])
+
+
+def heuristic_agent(name, **params):
+    """Return an `AlphaBetaPlayer` agent using the named heuristic of
+    HEURISTICS, with the given keyword parameters.
+    """
+    score_fn = HEURISTICS[name]
+    if params:
+        score_fn = partial(score_fn, **params)
+        name = "{}({})".format(name, ", ".join(
+            "{}={}".format(key, value) for key, value in sorted(params.items())))
+    return Agent(AlphaBetaPlayer(score_fn=score_fn), name)
+
+
+def sweep(name, param, values, **kwargs):
+    """Test the named heuristic with each value of a keyword parameter
+    against the heuristic with its default parameters, and generate the
+    outcome of each test (see `sprt` for the keyword arguments).
+    """
+    base = heuristic_agent(name)
+    for value in values:
+        yield sprt(heuristic_agent(name, **{param: value}), base, **kwargs)
+
+
+def record(path, outcome):
+    """Append the outcome of a test to the results file. """
+    outcome = OrderedDict(outcome)
+    outcome["date"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(path, "a") as f:
+        f.write(json.dumps(outcome) + "\n")
+
+
+def print_outcome(outcome):
+    print("{:<28} vs {:<16} {:<13} {:>5} games {:>5}-{:<5} LLR {:6.2f} "
+          "[{:.2f}, {:.2f}]  Elo {:+.0f} [{:+.0f}, {:+.0f}]".format(
+              outcome["test"], outcome["base"], outcome["result"],
+              outcome["games"], outcome["wins"], outcome["losses"],
+              outcome["llr"], outcome["bounds"][0], outcome["bounds"][1],
+              outcome["elo"], *outcome["elo_interval"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare heuristics with " +
+        "sequential probability ratio tests between alpha-beta agents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    test = commands.add_parser("sprt", help="Test one heuristic against another.")
+    test.add_argument('heuristic', choices=list(HEURISTICS))
+    test.add_argument('--base', choices=list(HEURISTICS), default="improved_score")
+
+    sweep_parser = commands.add_parser("sweep", help="Test each value of a " +
+        "heuristic parameter against the default value.")
+    sweep_parser.add_argument('heuristic', choices=list(HEURISTICS))
+    sweep_parser.add_argument('param', help="A keyword parameter of the heuristic.")
+    sweep_parser.add_argument('values', type=float, nargs='+')
+
+    for command in (test, sweep_parser):
+        command.add_argument('-w', '--workers', type=int, default=1,
+                             help="Number of processes playing games in parallel.")
+        command.add_argument('--elo0', type=float, default=ELO0)
+        command.add_argument('--elo1', type=float, default=ELO1)
+        command.add_argument('--alpha', type=float, default=ALPHA)
+        command.add_argument('--beta', type=float, default=BETA)
+        command.add_argument('--max-games', type=int, default=MAX_GAMES)
+        command.add_argument('--seed', type=int, default=0)
+        command.add_argument('--results', default=RESULTS_FILE,
+                             help="Append the outcome of every test to this file.")
+    args = parser.parse_args()
+
+    kwargs = dict(elo0=args.elo0, elo1=args.elo1, alpha=args.alpha,
+                  beta=args.beta, max_games=args.max_games,
+                  workers=args.workers, seed=args.seed)
+    pool = make_pool(args.workers) if args.workers > 1 else None
+    try:
+        if args.command == "sprt":
+            outcomes = [sprt(heuristic_agent(args.heuristic),
+                             heuristic_agent(args.base), pool=pool, **kwargs)]
+        else:
+            outcomes = sweep(args.heuristic, args.param, args.values,
+                             pool=pool, **kwargs)
+        for outcome in outcomes:
+            record(args.results, outcome)
+            print_outcome(outcome)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,11 @@ then create problem instances and solve them with calls to the various search
 functions."""
 
 from .utils import (
-    is_in, memoize, print_table, Stack, FIFOQueue, PriorityQueue, name
+    is_in, memoize, print_table, Stack, FIFOQueue, Queue, name
 )
 
+import collections
+import heapq
 import sys
 
 infinity = float('inf')
@@ -64,6 +66,12 @@ class Problem:
         """For optimization problems, each state has a value.  Hill-climbing
         and related algorithms try to maximize this value."""
         raise NotImplementedError
+
+    def stale_node(self, node):
+        """Called by best_first_graph_search for each node it pops from the
+        frontier and skips, because its state was expanded or queued again
+        by a cheaper path. Does nothing by default."""
+        pass
 # ______________________________________________________________________________
 
 
@@ -130,6 +138,38 @@ class Node:
         return hash(self.state)
 
 # ______________________________________________________________________________
+
+
+class NodeQueue(Queue):
+
+    """A First-In-First-Out (or, with lifo=True, Last-In-First-Out) queue of
+    search nodes that counts the queued nodes of each state, so that
+    `node in frontier` is a dict lookup of node.state instead of a scan of
+    the queue comparing nodes. (Tree searches may queue a state twice.)"""
+
+    def __init__(self, lifo=False):
+        self.nodes = collections.deque()
+        self.lifo = lifo
+        self.states = {}
+
+    def append(self, node):
+        self.nodes.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def pop(self):
+        node = self.nodes.pop() if self.lifo else self.nodes.popleft()
+        count = self.states.pop(node.state) - 1
+        if count:
+            self.states[node.state] = count
+        return node
+
+    def __contains__(self, node):
+        return node.state in self.states
+
+# ______________________________________________________________________________
 # Uninformed Search algorithms
 
 
@@ -175,7 +215,7 @@ def depth_first_tree_search(problem):
 
 def depth_first_graph_search(problem):
     "Search the deepest nodes in the search tree first."
-    return graph_search(problem, Stack())
+    return graph_search(problem, NodeQueue(lifo=True))
 
 
 def breadth_first_search(problem):
@@ -183,7 +223,7 @@ def breadth_first_search(problem):
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = FIFOQueue()
+    frontier = NodeQueue()
     frontier.append(node)
     explored = set()
     while frontier:
@@ -204,27 +244,35 @@ def best_first_graph_search(problem, f):
     first search; if f is node.depth then we have breadth-first search.
     There is a subtlety: the line "f = memoize(f, 'f')" means that the f
     values will be cached on the nodes as they are computed. So after doing
-    a best first search you can examine the f values of the path returned."""
+    a best first search you can examine the f values of the path returned.
+
+    The frontier is a binary heap of (f, node) entries with a dict from each
+    state to the lowest path cost it was queued with. A child reaching a
+    queued state by a cheaper path is pushed again instead of replacing the
+    old entry, which becomes stale and is skipped when popped (see
+    Problem.stale_node)."""
     f = memoize(f, 'f')
     node = Node(problem.initial)
     if problem.goal_test(node.state):
         return node
-    frontier = PriorityQueue(min, f)
-    frontier.append(node)
+    frontier = [(f(node), node)]
+    best_cost = {node.state: node.path_cost}
     explored = set()
     while frontier:
-        node = frontier.pop()
+        _, node = heapq.heappop(frontier)
+        if node.state in explored or node.path_cost > best_cost[node.state]:
+            problem.stale_node(node)
+            continue
         if problem.goal_test(node.state):
             return node
         explored.add(node.state)
         for child in node.expand(problem):
-            if child.state not in explored and child not in frontier:
-                frontier.append(child)
-            elif child in frontier:
-                incumbent = frontier[child]
-                if f(child) < f(incumbent):
-                    # del frontier[incumbent]
-                    frontier.append(child)
+            if child.state in explored:
+                continue
+            cost = best_cost.get(child.state)
+            if cost is None or child.path_cost < cost:
+                best_cost[child.state] = child.path_cost
+                heapq.heappush(frontier, (f(child), child))
     return None
 
 
@@ -321,7 +369,7 @@ class InstrumentedProblem(Problem):
 
     def __init__(self, problem):
         self.problem = problem
-        self.succs = self.goal_tests = self.states = 0
+        self.succs = self.goal_tests = self.states = self.stale = 0
         self.found = None
 
     def actions(self, state):
@@ -345,6 +393,10 @@ class InstrumentedProblem(Problem):
     def value(self, state):
         return self.problem.value(state)
 
+    def stale_node(self, node):
+        self.stale += 1
+        self.problem.stale_node(node)
+
     def __getattr__(self, attr):
         return getattr(self.problem, attr)
 
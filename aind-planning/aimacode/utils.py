@@ -562,10 +562,6 @@ class FIFOQueue(Queue):
     def __len__(self):
         return len(self.Q)
 
-    def extend(self, items):
-        self.Q.extend(items)
-        self.members.update({k: self.members[k] + 1 for k in items})
-
     def pop(self):
         item = self.Q.popleft()
         self.members[item] -= 1
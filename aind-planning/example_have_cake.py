@@ -1,4 +1,3 @@
-from aimacode.logic import PropKB
 from aimacode.planning import Action
 from aimacode.search import (
     Node, breadth_first_search, astar_search, depth_first_graph_search,
@@ -6,9 +5,9 @@ from aimacode.search import (
 )
 from aimacode.utils import expr
 from lp_utils import (
-    FluentState, encode_state, decode_state
+    ActionIndex, FluentState, encode_state, fluent_mask
 )
-from my_planning_graph import PlanningGraph
+from my_planning_graph import level_cost_graph
 from run_search import run_search
 
 from functools import lru_cache
@@ -19,6 +18,8 @@ class HaveCakeProblem(Problem):
         self.state_map = initial.pos + initial.neg
         Problem.__init__(self, encode_state(initial, self.state_map), goal=goal)
         self.actions_list = self.get_actions()
+        self.goal_mask = fluent_mask(set(goal), self.state_map)
+        self.action_index = ActionIndex(self.actions_list, self.state_map)
 
     def get_actions(self):
         precond_pos = [expr("Have(Cake)")]
@@ -37,46 +38,15 @@ class HaveCakeProblem(Problem):
                              [effect_add, effect_rem])
         return [eat_action, bake_action]
 
-    def actions(self, state: str) -> list:  # of Action
-        possible_actions = []
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in kb.clauses:
-                    is_possible = False
-            for clause in action.precond_neg:
-                if clause in kb.clauses:
-                    is_possible = False
-            if is_possible:
-                possible_actions.append(action)
-        return possible_actions
-
-    def result(self, state: str, action: Action):
-        new_state = FluentState([], [])
-        old_state = decode_state(state, self.state_map)
-        for fluent in old_state.pos:
-            if fluent not in action.effect_rem:
-                new_state.pos.append(fluent)
-        for fluent in action.effect_add:
-            if fluent not in new_state.pos:
-                new_state.pos.append(fluent)
-        for fluent in old_state.neg:
-            if fluent not in action.effect_add:
-                new_state.neg.append(fluent)
-        for fluent in action.effect_rem:
-            if fluent not in new_state.neg:
-                new_state.neg.append(fluent)
-        return encode_state(new_state, self.state_map)
-
-    def goal_test(self, state: str) -> bool:
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                return False
-        return True
+    def actions(self, state: int) -> list:  # of Action
+        return self.action_index.applicable(state)
+
+    def result(self, state: int, action: Action):
+        _, _, effect_add, effect_rem = self.action_index.masks(action)
+        return state & ~effect_rem | effect_add
+
+    def goal_test(self, state: int) -> bool:
+        return state & self.goal_mask == self.goal_mask
 
     def h_1(self, node: Node):
         # note that this is not a true heuristic
@@ -87,10 +57,8 @@ class HaveCakeProblem(Problem):
     def h_pg_levelsum(self, node: Node):
         # uses the planning graph level-sum heuristic calculated
         # from this node to the goal
-        # requires implementation in PlanningGraph
-        pg = PlanningGraph(self, node.state)
-        pg_levelsum = pg.h_levelsum()
-        return pg_levelsum
+        # the literal levels of the planning graph are grounded once per problem
+        return level_cost_graph(self).h_levelsum(node.state)
 
     @lru_cache(maxsize=8192)
     def h_ignore_preconditions(self, node: Node):
@@ -34,35 +34,119 @@ def conjunctive_sentence(pos_list, neg_list):
     return associate('&', clauses)
 
 
-def encode_state(fs: FluentState, fluent_map: list) -> str:
-    """ encode fluents to a string of T/F using mapping
+def fluent_mask(fluents, fluent_map: list) -> int:
+    """ encode a collection of fluents as an integer bitset using mapping
 
-    :param fs: FluentState object
+    :param fluents: collection of fluents (e.g. a list or set of expr)
     :param fluent_map: ordered list of possible fluents for the problem
-    :return: str eg. "TFFTFT" string of mapped positive and negative fluents
+    :return: int with the bit of each given fluent set
+
+    The first fluent of the map is the most significant bit, so comparing
+    two encoded states orders them like the "TFFTFT" strings they replace.
     """
-    state_tf = []
+    mask = 0
     for fluent in fluent_map:
-        if fluent in fs.pos:
-            state_tf.append('T')
-        else:
-            state_tf.append('F')
-    return "".join(state_tf)
+        mask <<= 1
+        if fluent in fluents:
+            mask |= 1
+    return mask
 
 
-def decode_state(state: str, fluent_map: list) -> FluentState:
-    """ decode string of T/F as fluent per mapping
+def encode_state(fs: FluentState, fluent_map: list) -> int:
+    """ encode fluents to an integer bitset using mapping
 
-    :param state: str eg. "TFFTFT" string of mapped positive and negative fluents
+    :param fs: FluentState object
     :param fluent_map: ordered list of possible fluents for the problem
-    :return: fs: FluentState object
+    :return: int eg. 0b100101 with the bits of the positive fluents set
+    """
+    return fluent_mask(set(fs.pos), fluent_map)
+
 
-    lengths of state string and fluent_map list must be the same
+def decode_state(state: int, fluent_map: list) -> FluentState:
+    """ decode integer bitset as fluent per mapping
+
+    :param state: int eg. 0b100101 with the bits of the positive fluents set
+    :param fluent_map: ordered list of possible fluents for the problem
+    :return: fs: FluentState object
     """
     fs = FluentState([], [])
-    for idx, char in enumerate(state):
-        if char == 'T':
-            fs.pos.append(fluent_map[idx])
+    bit = 1 << len(fluent_map)
+    for fluent in fluent_map:
+        bit >>= 1
+        if state & bit:
+            fs.pos.append(fluent)
         else:
-            fs.neg.append(fluent_map[idx])
+            fs.neg.append(fluent)
     return fs
+
+
+class ActionIndex():
+    """ index of the ground actions of a planning problem by precondition
+
+    Every action with positive preconditions watches one of them (the one
+    with the fewest watchers when the action is added), so the applicable
+    actions of a state are found among the watchers of its true fluents
+    instead of among all the actions of the problem.
+
+    :param actions: list of Action objects
+    :param fluent_map: ordered list of possible fluents for the problem
+    """
+
+    def __init__(self, actions: list, fluent_map: list):
+        self.fluent_map = fluent_map
+        self._masks = {}
+        self._always = []  # actions without positive preconditions
+        self._watchers = {}  # fluent bit -> list of (position, action, pos, neg)
+        for position, action in enumerate(actions):
+            masks = self._masks[action] = self.make_masks(action)
+            entry = (position, action, masks[0], masks[1])
+            if not masks[0]:
+                self._always.append(entry)
+                continue
+            bits = []
+            pos = masks[0]
+            while pos:
+                bit = pos & -pos
+                bits.append(bit)
+                pos ^= bit
+            watch = min(bits, key=lambda bit: len(self._watchers.get(bit, ())))
+            self._watchers.setdefault(watch, []).append(entry)
+
+    def make_masks(self, action) -> tuple:
+        """ encode the preconditions and effects of an action as bitsets
+
+        :param action: Action object
+        :return: tuple of int
+            (precond_pos, precond_neg, effect_add, effect_rem) masks
+        """
+        return tuple(fluent_mask(set(fluents), self.fluent_map)
+                     for fluents in (action.precond_pos, action.precond_neg,
+                                     action.effect_add, action.effect_rem))
+
+    def masks(self, action) -> tuple:
+        """ return the masks of an action (see `make_masks`)
+
+        Actions that are not in the index are encoded on every call.
+        """
+        masks = self._masks.get(action)
+        return masks if masks is not None else self.make_masks(action)
+
+    def applicable(self, state: int) -> list:
+        """ return the actions that can be executed in a state
+
+        :param state: int bitset of the true fluents of the state
+        :return: list of Action objects, in the order they were indexed
+        """
+        found = [entry for entry in self._always
+                 if not state & entry[3]]
+        watchers = self._watchers
+        rest = state
+        while rest:
+            bit = rest & -rest
+            rest ^= bit
+            for entry in watchers.get(bit, ()):
+                pos = entry[2]
+                if state & pos == pos and not state & entry[3]:
+                    found.append(entry)
+        found.sort()
+        return [entry[1] for entry in found]
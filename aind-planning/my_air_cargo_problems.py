@@ -1,13 +1,13 @@
-from aimacode.logic import PropKB
 from aimacode.planning import Action
 from aimacode.search import (
     Node, Problem,
 )
 from aimacode.utils import expr
 from lp_utils import (
-    FluentState, encode_state, decode_state,
+    ActionIndex, FluentState, encode_state, fluent_mask,
 )
-from my_planning_graph import PlanningGraph
+from my_planning_graph import level_cost_graph
+from relaxed_heuristics import relaxed_task
 
 from functools import lru_cache
 
@@ -34,6 +34,8 @@ class AirCargoProblem(Problem):
         self.planes = planes
         self.airports = airports
         self.actions_list = self.get_actions()
+        self.goal_mask = fluent_mask(set(goal), self.state_map)
+        self.action_index = ActionIndex(self.actions_list, self.state_map)
 
     def get_actions(self):
         """
@@ -120,39 +122,17 @@ class AirCargoProblem(Problem):
 
         return load_actions() + unload_actions() + fly_actions()
 
-    def actions(self, state: str) -> list:
+    def actions(self, state: int) -> list:
         """ Return the actions that can be executed in the given state.
 
-        :param state: str
-            state represented as T/F string of mapped fluents (state variables)
-            e.g. 'FTTTFF'
+        :param state: int
+            state represented as a bitset of mapped fluents (state variables)
+            e.g. 0b011100
         :return: list of Action objects
         """
-        possible_actions = []
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for action in self.actions_list:
-            can_be_executed = True
-
-            # are all positive preconditions satisfied in the state?
-            for precond in action.precond_pos:
-                if precond not in kb.clauses:
-                    can_be_executed = False
-                    break
-
-            if can_be_executed:
-                # are all negative preconditions satisfied in the state?
-                for precond in action.precond_neg:
-                    if precond in kb.clauses:
-                        can_be_executed = False
-                        break
-
-            if can_be_executed:
-                possible_actions.append(action)
-
-        return possible_actions
-
-    def result(self, state: str, action: Action):
+        return self.action_index.applicable(state)
+
+    def result(self, state: int, action: Action):
         """ Return the state that results from executing the given
         action in the given state. The action must be one of
         self.actions(state).
@@ -161,43 +141,16 @@ class AirCargoProblem(Problem):
         :param action: Action applied
         :return: resulting state after action
         """
-        new_state = FluentState([], [])
-        state_decoded = decode_state(state, self.state_map)
-
-        # add state positive fluent if they're not in action removed effects
-        for fluent in state_decoded.pos:
-            if fluent not in action.effect_rem:
-                new_state.pos.append(fluent)
-
-        # add state negative fluent if they're not in action added effects
-        for fluent in state_decoded.neg:
-            if fluent not in action.effect_add:
-                new_state.neg.append(fluent)
-
-        # add positive action effects
-        for fluent in action.effect_add:
-            if fluent not in new_state.pos:
-                new_state.pos.append(fluent)
-
-        # add negative action effects
-        for fluent in action.effect_rem:
-            if fluent not in new_state.neg:
-                new_state.neg.append(fluent)
+        _, _, effect_add, effect_rem = self.action_index.masks(action)
+        return state & ~effect_rem | effect_add
 
-        return encode_state(new_state, self.state_map)
-
-    def goal_test(self, state: str) -> bool:
+    def goal_test(self, state: int) -> bool:
         """ Test the state to see if goal is reached
 
-        :param state: str representing state
+        :param state: int representing state
         :return: bool
         """
-        kb = PropKB()
-        kb.tell(decode_state(state, self.state_map).pos_sentence())
-        for clause in self.goal:
-            if clause not in kb.clauses:
-                return False
-        return True
+        return state & self.goal_mask == self.goal_mask
 
     def h_1(self, node: Node):
         # note that this is not a true heuristic
@@ -211,10 +164,8 @@ class AirCargoProblem(Problem):
         out from the current state in order to satisfy each individual goal
         condition.
         """
-        # requires implemented PlanningGraph class
-        pg = PlanningGraph(self, node.state)
-        pg_levelsum = pg.h_levelsum()
-        return pg_levelsum
+        # the literal levels of the planning graph are grounded once per problem
+        return level_cost_graph(self).h_levelsum(node.state)
 
     @lru_cache(maxsize=8192)
     def h_ignore_preconditions(self, node: Node):
@@ -226,9 +177,37 @@ class AirCargoProblem(Problem):
         # see Russell-Norvig Ed-3 10.2.3  or Russell-Norvig Ed-2 11.2).
         # by this heuristic we need a difference between goals and positive fluents
         # of the state (i.e. whether the goal already achieved in the state)
-        unique_goals = set(self.goal)
-        unique_pos_fluents = set(decode_state(node.state, self.state_map).pos)
-        return len(unique_goals.difference(unique_pos_fluents))
+        return bin(self.goal_mask & ~node.state).count("1")
+
+    @lru_cache(maxsize=8192)
+    def h_max(self, node: Node):
+        """This heuristic estimates the number of actions needed to achieve
+        the most expensive goal condition when the delete effects of the
+        actions are ignored.  It is admissible.
+        """
+        return relaxed_task(self).h_max(node.state)
+
+    @lru_cache(maxsize=8192)
+    def h_add(self, node: Node):
+        """This heuristic sums the number of actions needed to achieve each
+        goal condition when the delete effects of the actions are ignored.
+        """
+        return relaxed_task(self).h_add(node.state)
+
+    @lru_cache(maxsize=8192)
+    def h_ff(self, node: Node):
+        """This heuristic counts the actions of a plan for the problem
+        without delete effects (the FF heuristic).
+        """
+        return relaxed_task(self).h_ff(node.state)
+
+    def h_lmcount(self, node: Node):
+        """This heuristic counts the landmarks (facts that are true at some
+        point of every plan from the initial state) that are not reached on
+        the path to the node.  It depends on the path, so it is not cached
+        by state.
+        """
+        return relaxed_task(self).h_lmcount(node)
 
 
 def air_cargo_p1() -> AirCargoProblem:
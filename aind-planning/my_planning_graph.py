@@ -1,7 +1,9 @@
 from aimacode.planning import Action
 from aimacode.search import Problem
 from aimacode.utils import expr
-from lp_utils import decode_state
+from lp_utils import ActionIndex, decode_state, fluent_mask
+
+from weakref import WeakKeyDictionary
 
 
 class PgNode():
@@ -197,20 +199,94 @@ def mutexify(node1: PgNode, node2: PgNode):
     node2.mutex.add(node1)
 
 
+def bits(mask: int):
+    """ generate the single-bit masks of the set bits of an integer bitset """
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        yield bit
+
+
+class ActionMutexes():
+    """
+    The ground actions of a planning graph (problem actions and no-ops) with
+    the mutexes between them that do not depend on the state, as integer
+    bitsets.
+
+    Literals are bits: the positive literal of fluent i of `state_map` is
+    the bit of `lp_utils.encode_state`, its negative literal the same bit
+    shifted left by the number of fluents.  Actions are bits too, by their
+    index in `actions`, and a mutex relation is a row of action (or literal)
+    bits per action (or literal).
+
+    :param fluent_map: ordered list of possible fluents for the problem
+    :param actions: list of Action (problem actions and no-op actions)
+    """
+
+    def __init__(self, fluent_map: list, actions: list):
+        n = self.num_fluents = len(fluent_map)
+        self.actions = actions
+        self.action_ids = {}
+        self.literal_bits = {}
+        for idx, fluent in enumerate(fluent_map):
+            bit = 1 << (n - 1 - idx)
+            self.literal_bits[(fluent, True)] = bit
+            self.literal_bits[(fluent, False)] = bit << n
+
+        index = ActionIndex(actions, fluent_map)
+        self.preconds = []
+        self.effects = []
+        self.persistent = 0
+        self.producers = {}  # literal bit -> actions adding the literal
+        self.consumers = {}  # literal bit -> actions requiring the literal
+        for idx, action in enumerate(actions):
+            pos, neg, add, rem = index.masks(action)
+            precond, effect = pos | neg << n, add | rem << n
+            self.action_ids[(action.name, action.args)] = idx
+            self.preconds.append(precond)
+            self.effects.append(effect)
+            if precond == effect:
+                self.persistent |= 1 << idx
+            for literal in bits(precond):
+                self.consumers[literal] = self.consumers.get(literal, 0) | 1 << idx
+            for literal in bits(effect):
+                self.producers[literal] = self.producers.get(literal, 0) | 1 << idx
+
+        # inconsistent effects and interference: an effect of one action
+        # negates an effect or a precondition of the other
+        self.conflicts = []
+        for idx in range(len(actions)):
+            row = 0
+            for literal in bits(self.negate(self.effects[idx])):
+                row |= self.producers.get(literal, 0) | self.consumers.get(literal, 0)
+            for literal in bits(self.negate(self.preconds[idx])):
+                row |= self.producers.get(literal, 0)
+            self.conflicts.append(row & ~(1 << idx))
+
+    def negate(self, literals: int) -> int:
+        """ return the negations of a bitset of literals """
+        n = self.num_fluents
+        return literals >> n | (literals & ((1 << n) - 1)) << n
+
+
+_action_mutexes = WeakKeyDictionary()
+
+
 class PlanningGraph():
     """
     A planning graph as described in chapter 10 of the AIMA text. The planning
     graph can be used to reason about 
     """
 
-    def __init__(self, problem: Problem, state: str, serial_planning=True):
+    def __init__(self, problem: Problem, state: int, serial_planning=True):
         """
         :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
-        :param state: str (will be in form TFTTFF... representing fluent states)
+        :param state: int (bitset of the fluents of the state, see lp_utils.encode_state)
         :param serial_planning: bool (whether or not to assume that only one action can occur at a time)
         Instance variable calculated:
             fs: FluentState
                 the state represented as positive and negative fluent literal lists
+            static: ActionMutexes of the problem, shared by its planning graphs
             all_actions: list of the PlanningProblem valid ground actions combined with calculated no-op actions
             s_levels: list of sets of PgNode_s, where each set in the list represents an S-level in the planning graph
             a_levels: list of sets of PgNode_a, where each set in the list represents an A-level in the planning graph
@@ -218,7 +294,15 @@ class PlanningGraph():
         self.problem = problem
         self.fs = decode_state(state, problem.state_map)
         self.serial = serial_planning
-        self.all_actions = self.problem.actions_list + self.noop_actions(self.problem.state_map)
+        # the no-op actions and the static action mutexes are computed once per problem
+        self.static = _action_mutexes.get(problem)
+        if self.static is None:
+            all_actions = self.problem.actions_list + self.noop_actions(self.problem.state_map)
+            self.static = _action_mutexes[problem] = ActionMutexes(problem.state_map, all_actions)
+        self.all_actions = self.static.actions
+        # mutex rows of the last A and S levels, see update_a_mutex and update_s_mutex
+        self.a_mutex_rows = {}
+        self.s_mutex_rows = {}
         self.s_levels = []
         self.a_levels = []
         self.create_graph()
@@ -311,19 +395,23 @@ class PlanningGraph():
         #   to see if a proposed PgNode_a has prenodes that are a subset of the previous S level.  Once an
         #   action node is added, it MUST be connected to the S node instances in the appropriate s_level set.
 
-        a_nodes = set()
-        for action in self.all_actions:
-            # create action node
-            a_node = PgNode_a(action)
+        s_level = {s_node: s_node for s_node in self.s_levels[level]}
+        literals = 0
+        for s_node in s_level:
+            literals |= self.static.literal_bits[(s_node.symbol, s_node.is_pos)]
 
+        a_nodes = set()
+        for action, precond in zip(self.all_actions, self.static.preconds):
             # check whether all precondtions are satisfied
-            if a_node.prenodes.issubset(self.s_levels[level]):
+            if literals & precond == precond:
+                # create action node
+                a_node = PgNode_a(action)
                 a_nodes.add(a_node)
                 # connect state and action nodes
-                for s_node in self.s_levels[level]:
-                    if s_node in a_node.prenodes:
-                        s_node.children.add(a_node)
-                        a_node.parents.add(s_node)
+                for prenode in a_node.prenodes:
+                    s_node = s_level[prenode]
+                    s_node.children.add(a_node)
+                    a_node.parents.add(s_node)
 
         self.a_levels.append(a_nodes)
 
@@ -346,19 +434,20 @@ class PlanningGraph():
         #   all of the new S nodes as children of all the A nodes that could produce them, and likewise add the A nodes to the
         #   parent sets of the S nodes
         
-        s_nodes = set()
+        s_nodes = {}
         for a_node in self.a_levels[level - 1]:
             # add state nodes according to effects of action nodes
             for effect in a_node.effnodes:
-                # create state node
-                s_node = PgNode_s(effect.symbol, effect.is_pos)
-                s_nodes.add(s_node)
+                # create state node, once per literal
+                s_node = s_nodes.get(effect)
+                if s_node is None:
+                    s_node = s_nodes[effect] = PgNode_s(effect.symbol, effect.is_pos)
 
                 # connect state and action nodes
                 a_node.children.add(s_node)
                 s_node.parents.add(a_node)
 
-        self.s_levels.append(s_nodes)
+        self.s_levels.append(set(s_nodes.values()))
 
     def update_a_mutex(self, nodeset):
         """ Determine and update sibling mutual exclusion for A-level nodes
@@ -371,18 +460,39 @@ class PlanningGraph():
            Interference
            Competing needs
 
+        The pairwise tests below are evaluated for the whole level at once on
+        the bitsets of `self.static`: the static conflicts (inconsistent
+        effects and interference) are precomputed per action, and two actions
+        have competing needs if a precondition of one is among the literals
+        that are mutex with a precondition of the other in the S level (the
+        last one added, whose mutex rows are in `self.s_mutex_rows`).
+
         :param nodeset: set of PgNode_a (siblings in the same level)
         :return:
             mutex set in each PgNode_a in the set is appropriately updated
         """
-        nodelist = list(nodeset)
-        for i, n1 in enumerate(nodelist[:-1]):
-            for n2 in nodelist[i + 1:]:
-                if (self.serialize_actions(n1, n2) or
-                        self.inconsistent_effects_mutex(n1, n2) or
-                        self.interference_mutex(n1, n2) or
-                        self.competing_needs_mutex(n1, n2)):
-                    mutexify(n1, n2)
+        static = self.static
+        nodes = {static.action_ids[(node.action.name, node.action.args)]: node
+                 for node in nodeset}
+        level_mask = 0
+        for idx in nodes:
+            level_mask |= 1 << idx
+
+        rows = {}
+        for idx in nodes:
+            row = static.conflicts[idx]
+            if self.serial and not static.persistent >> idx & 1:
+                row |= ~static.persistent
+            needs = 0
+            for literal in bits(static.preconds[idx]):
+                needs |= self.s_mutex_rows.get(literal, 0)
+            for literal in bits(needs):
+                row |= static.consumers.get(literal, 0)
+            rows[idx] = row & level_mask & ~(1 << idx)
+
+        for idx, node in nodes.items():
+            node.mutex.update(nodes[other.bit_length() - 1] for other in bits(rows[idx]))
+        self.a_mutex_rows = rows
 
     def serialize_actions(self, node_a1: PgNode_a, node_a2: PgNode_a) -> bool:
         """
@@ -478,15 +588,48 @@ class PlanningGraph():
            Negation
            Inconsistent support
 
-        :param nodeset: set of PgNode_a (siblings in the same level)
+        As for `update_a_mutex`, the pairwise tests are evaluated on bitsets:
+        the actions that are mutex with every action achieving a literal are
+        the intersection of their mutex rows (in `self.a_mutex_rows`, from the
+        A level that achieves this S level), and another literal has
+        inconsistent support if all of its achievers are in it.
+
+        :param nodeset: set of PgNode_s (siblings in the same level)
         :return:
-            mutex set in each PgNode_a in the set is appropriately updated
-        """
-        nodelist = list(nodeset)
-        for i, n1 in enumerate(nodelist[:-1]):
-            for n2 in nodelist[i + 1:]:
-                if self.negation_mutex(n1, n2) or self.inconsistent_support_mutex(n1, n2):
-                    mutexify(n1, n2)
+            mutex set in each PgNode_s in the set is appropriately updated
+        """
+        static = self.static
+        nodes = {static.literal_bits[(node.symbol, node.is_pos)]: node
+                 for node in nodeset}
+        level_mask = 0
+        for idx in self.a_mutex_rows:
+            level_mask |= 1 << idx
+
+        achievers = {}
+        all_mutex = {}
+        for literal in nodes:
+            achievers[literal] = static.producers.get(literal, 0) & level_mask
+            common = -1
+            for action in bits(achievers[literal]):
+                common &= self.a_mutex_rows[action.bit_length() - 1]
+            all_mutex[literal] = common
+
+        literals = 0
+        for literal in nodes:
+            literals |= literal
+
+        rows = {}
+        for literal in nodes:
+            row = static.negate(literal)
+            common = all_mutex[literal]
+            for other in nodes:
+                if not achievers[other] & ~common:
+                    row |= other
+            rows[literal] = row & literals & ~literal
+
+        for literal, node in nodes.items():
+            node.mutex.update(nodes[other] for other in bits(rows[literal]))
+        self.s_mutex_rows = rows
 
     def negation_mutex(self, node_s1: PgNode_s, node_s2: PgNode_s) -> bool:
         """
@@ -546,3 +689,113 @@ class PlanningGraph():
                     goals_found_so_far.add(s_node.symbol)
 
         return level_sum
+
+
+class LevelCostGraph():
+    """
+    The literal levels of the planning graphs of a planning problem, kept as
+    bitsets to compute the level-sum heuristic from many states.
+
+    Which literals appear in an S level does not depend on mutexes: an action
+    joins an A level when its preconditions are in the previous S level, and
+    the no-op actions carry every literal over to the next level.  The S
+    levels of `PlanningGraph` are therefore the fixpoint iteration of the
+    relaxed problem, which this class computes with one bit per literal (the
+    positive literal of fluent i of `problem.state_map` on the bits of
+    `lp_utils.encode_state`, its negative literal on the same bits shifted
+    left by the number of fluents).  The actions are grounded once per
+    problem, and each level only checks the actions with a precondition
+    among the literals that are new in the previous level.
+    """
+
+    def __init__(self, problem: Problem):
+        """
+        :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+        Instance variables calculated:
+            preconds: list of int, precondition literals of each action
+            effects: list of int, effect literals of each action
+            watchers: dict mapping each literal bit to the indices of the actions requiring it
+            goal_mask: int, positive literals of the goal
+        """
+        fluents = problem.state_map
+        self.num_fluents = len(fluents)
+        self.all_fluents = (1 << self.num_fluents) - 1
+        index = ActionIndex(problem.actions_list, fluents)
+        self.preconds = []
+        self.effects = []
+        self.watchers = {}
+        self.unconditional = []  # actions without preconditions
+        for idx, action in enumerate(problem.actions_list):
+            pos, neg, add, rem = index.masks(action)
+            precond = pos | neg << self.num_fluents
+            self.preconds.append(precond)
+            self.effects.append(add | rem << self.num_fluents)
+            if not precond:
+                self.unconditional.append(idx)
+            while precond:
+                bit = precond & -precond
+                precond ^= bit
+                self.watchers.setdefault(bit, []).append(idx)
+        self.goal_mask = fluent_mask(set(problem.goal), fluents)
+
+    def literal_levels(self, state: int):
+        """Generate the literals of each S level of the planning graph of a
+        state until the graph levels off
+
+        :param state: int (bitset of the fluents of the state, see lp_utils.encode_state)
+        :return: generator of int, the literal bitset of S0, S1, ...
+        """
+        literals = state | (~state & self.all_fluents) << self.num_fluents
+        new = literals
+        applied = set()
+        candidates = list(self.unconditional)
+        while True:
+            yield literals
+            while new:
+                bit = new & -new
+                new ^= bit
+                candidates.extend(self.watchers.get(bit, ()))
+            effects = 0
+            for idx in candidates:
+                precond = self.preconds[idx]
+                if literals & precond == precond and idx not in applied:
+                    applied.add(idx)
+                    effects |= self.effects[idx]
+            new = effects & ~literals
+            if not new:
+                return
+            literals |= new
+            candidates = []
+
+    def h_levelsum(self, state: int) -> int:
+        """The sum of the level costs of the goals from a state, equal to
+        `PlanningGraph(problem, state).h_levelsum()`
+
+        :param state: int (bitset of the fluents of the state, see lp_utils.encode_state)
+        :return: int
+        """
+        level_sum = 0
+        missing = self.goal_mask
+        for level, literals in enumerate(self.literal_levels(state)):
+            found = missing & literals
+            if found:
+                level_sum += level * bin(found).count("1")
+                missing ^= found
+                if not missing:
+                    break
+        return level_sum
+
+
+_level_cost_graphs = WeakKeyDictionary()
+
+
+def level_cost_graph(problem: Problem) -> LevelCostGraph:
+    """Return the `LevelCostGraph` of a problem, created on the first call
+
+    :param problem: PlanningProblem
+    :return: LevelCostGraph
+    """
+    graph = _level_cost_graphs.get(problem)
+    if graph is None:
+        graph = _level_cost_graphs[problem] = LevelCostGraph(problem)
+    return graph
@@ -0,0 +1,221 @@
+"""Delete-relaxation and landmark heuristics for planning problems.
+
+The heuristics ignore the delete effects of the actions: literals are only
+ever added, so the cost of a literal is the cost of the cheapest way to reach
+it from a state.  The actions are compiled once per problem into lists of
+literal indices (the positive literal of fluent i of `problem.state_map` on
+the bit of `lp_utils.encode_state`, its negative literal on the same bit
+shifted left by the number of fluents, as in `my_planning_graph`), and all
+actions cost 1.
+
+    h_max      the cost of the most expensive goal (admissible)
+    h_add      the sum of the costs of the goals
+    h_ff       the number of actions of a relaxed plan extracted from the
+               cheapest achievers of h_add
+    h_lmcount  the number of landmarks (facts true at some point of every
+               plan) not reached yet on the path to a node
+"""
+from heapq import heappop, heappush
+from weakref import WeakKeyDictionary
+
+from aimacode.search import Node
+from lp_utils import ActionIndex, fluent_mask
+
+INFINITY = float('inf')
+
+
+def literal_indices(mask: int) -> list:
+    """ return the indices of the set bits of an integer bitset """
+    indices = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        indices.append(bit.bit_length() - 1)
+    return indices
+
+
+class RelaxedTask():
+    """
+    The ground actions and goals of a planning problem compiled to literal
+    indices for the relaxed heuristics.
+
+    :param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+    """
+
+    def __init__(self, problem):
+        fluents = problem.state_map
+        n = self.num_fluents = len(fluents)
+        self.all_fluents = (1 << n) - 1
+        index = ActionIndex(problem.actions_list, fluents)
+        self.precond_masks = []
+        self.effect_masks = []
+        self.preconds = []
+        self.effects = []
+        self.consumers = [[] for _ in range(2 * n)]  # actions requiring each literal
+        self.unconditional = []  # actions without preconditions
+        for idx, action in enumerate(problem.actions_list):
+            pos, neg, add, rem = index.masks(action)
+            self.precond_masks.append(pos | neg << n)
+            self.effect_masks.append(add | rem << n)
+            self.preconds.append(literal_indices(self.precond_masks[-1]))
+            self.effects.append(literal_indices(self.effect_masks[-1]))
+            for literal in self.preconds[-1]:
+                self.consumers[literal].append(idx)
+            if not self.preconds[-1]:
+                self.unconditional.append(idx)
+        self.goal_mask = fluent_mask(set(problem.goal), fluents)
+        self.goals = literal_indices(self.goal_mask)
+        self.landmarks = self.find_landmarks(problem.initial)
+
+    def literals(self, state: int) -> int:
+        """ return the bitset of the positive and negative literals of a state """
+        return state | (~state & self.all_fluents) << self.num_fluents
+
+    def explore(self, state: int, additive: bool):
+        """ compute the relaxed cost of every literal from a state, until the
+        costs of the goals are known
+
+        The cost of an action is 1 plus the maximum (or, if `additive`, the
+        sum) of the costs of its preconditions, and the cost of a literal the
+        cost of its cheapest achiever.
+
+        :param state: int (bitset of the fluents of the state, see lp_utils.encode_state)
+        :param additive: bool (whether to add the costs of the preconditions of an action)
+        :return: (list of cost per literal, list of cheapest achiever per literal)
+        """
+        cost = [INFINITY] * (2 * self.num_fluents)
+        achiever = [None] * (2 * self.num_fluents)
+        queue = []
+        for literal in literal_indices(self.literals(state)):
+            cost[literal] = 0
+            queue.append((0, literal))
+        missing = sum(cost[goal] > 0 for goal in self.goals)
+        unsatisfied = [len(preconds) for preconds in self.preconds]
+        support = [0] * len(self.preconds)
+        ready = list(self.unconditional)
+
+        while True:
+            for action in ready:
+                action_cost = support[action] + 1
+                for literal in self.effects[action]:
+                    if action_cost < cost[literal]:
+                        cost[literal] = action_cost
+                        achiever[literal] = action
+                        heappush(queue, (action_cost, literal))
+            if not queue or not missing:
+                return cost, achiever
+            literal_cost, literal = heappop(queue)
+            ready = []
+            if literal_cost > cost[literal]:
+                continue
+            if literal_cost and self.goal_mask >> literal & 1:
+                missing -= 1
+            for action in self.consumers[literal]:
+                unsatisfied[action] -= 1
+                if additive:
+                    support[action] += literal_cost
+                elif literal_cost > support[action]:
+                    support[action] = literal_cost
+                if not unsatisfied[action]:
+                    ready.append(action)
+
+    def h_max(self, state: int):
+        """ the largest relaxed cost of a goal (admissible) """
+        return max([self.explore(state, False)[0][goal] for goal in self.goals] + [0])
+
+    def h_add(self, state: int):
+        """ the sum of the relaxed costs of the goals """
+        cost, _ = self.explore(state, True)
+        return sum(cost[goal] for goal in self.goals)
+
+    def h_ff(self, state: int):
+        """ the number of actions of the relaxed plan made of the cheapest
+        achievers of the goals and, recursively, of their preconditions
+        """
+        cost, achiever = self.explore(state, True)
+        open_goals = [goal for goal in self.goals if cost[goal]]
+        if any(cost[goal] == INFINITY for goal in open_goals):
+            return INFINITY
+        plan = set()
+        seen = set(open_goals)
+        while open_goals:
+            action = achiever[open_goals.pop()]
+            plan.add(action)
+            for literal in self.preconds[action]:
+                if cost[literal] and literal not in seen:
+                    seen.add(literal)
+                    open_goals.append(literal)
+        return len(plan)
+
+    def reachable(self, state: int, excluded: int = 0) -> int:
+        """ return the bitset of the literals reachable from a state in the
+        relaxed problem without the actions in the `excluded` bitset
+        """
+        reached = self.literals(state)
+        changed = True
+        while changed:
+            changed = False
+            for idx, (precond, effect) in enumerate(zip(self.precond_masks, self.effect_masks)):
+                if (reached & precond == precond and effect & ~reached and
+                        not excluded >> idx & 1):
+                    reached |= effect
+                    changed = True
+        return reached
+
+    def find_landmarks(self, state: int) -> int:
+        """ return the bitset of the fluents that are landmarks from a state
+
+        The goals are landmarks, and so is every fluent false in the state
+        without which the relaxed problem is unsolvable, i.e. such that the
+        goals are unreachable without the actions that add it.
+        """
+        landmarks = self.goal_mask
+        reachable = self.reachable(state)
+        for literal in literal_indices(reachable & ~state & self.all_fluents & ~self.goal_mask):
+            achievers = 0
+            for idx, effect in enumerate(self.effect_masks):
+                if effect >> literal & 1:
+                    achievers |= 1 << idx
+            if self.reachable(state, achievers) & self.goal_mask != self.goal_mask:
+                landmarks |= 1 << literal
+        return landmarks
+
+    def accepted_landmarks(self, node: Node) -> int:
+        """ return the bitset of the landmarks reached on the path to a node
+
+        The result is stored on the nodes of the path, so the landmarks of a
+        child are those of its parent and those true in its state.
+        """
+        path = []
+        while node is not None and not hasattr(node, 'accepted_landmarks'):
+            path.append(node)
+            node = node.parent
+        accepted = node.accepted_landmarks if node is not None else 0
+        for node in reversed(path):
+            accepted |= node.state & self.landmarks
+            node.accepted_landmarks = accepted
+        return accepted
+
+    def h_lmcount(self, node: Node):
+        """ the number of landmarks not reached on the path to a node, plus
+        the goals reached on the path but false in the node
+        """
+        accepted = self.accepted_landmarks(node)
+        required_again = self.goal_mask & accepted & ~node.state
+        return (bin(self.landmarks & ~accepted).count("1") +
+                bin(required_again).count("1"))
+
+
+_relaxed_tasks = WeakKeyDictionary()
+
+
+def relaxed_task(problem) -> RelaxedTask:
+    """Return the `RelaxedTask` of a problem, created on the first call
+
+    :param problem: PlanningProblem
+    :return: RelaxedTask
+    """
+    task = _relaxed_tasks.get(problem)
+    if task is None:
+        task = _relaxed_tasks[problem] = RelaxedTask(problem)
+    return task
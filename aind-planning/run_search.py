@@ -36,6 +36,10 @@ SEARCHES = [["breadth_first_search", breadth_first_search, ""],
             ['astar_search', astar_search, 'h_1'],
             ['astar_search', astar_search, 'h_ignore_preconditions'],
             ['astar_search', astar_search, 'h_pg_levelsum'],
+            ['astar_search', astar_search, 'h_max'],
+            ['astar_search', astar_search, 'h_add'],
+            ['astar_search', astar_search, 'h_ff'],
+            ['astar_search', astar_search, 'h_lmcount'],
             ]
 
 
@@ -46,7 +50,8 @@ class PrintableProblem(InstrumentedProblem):
     """
 
     def __repr__(self):
-        return '{:^10d}  {:^10d}  {:^10d}'.format(self.succs, self.goal_tests, self.states)
+        return '{:^10d}  {:^10d}  {:^10d}  {:^10d}'.format(self.succs, self.goal_tests,
+                                                        self.states, self.stale)
 
 
 def run_search(problem, search_function, parameter=None):
@@ -58,7 +63,7 @@ def run_search(problem, search_function, parameter=None):
     else:
         node = search_function(ip)
     end = timer()
-    print("\nExpansions   Goal Tests   New Nodes")
+    print("\nExpansions   Goal Tests   New Nodes   Stale Nodes")
     print("{}\n".format(ip))
     show_solution(node, end - start)
     print()
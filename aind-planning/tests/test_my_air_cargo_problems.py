@@ -6,7 +6,7 @@ from aimacode.planning import Action
 from aimacode.utils import expr
 from aimacode.search import Node
 import unittest
-from lp_utils import decode_state
+from lp_utils import FluentState, decode_state, encode_state
 from my_air_cargo_problems import (
     air_cargo_p1, air_cargo_p2, air_cargo_p3,
 )
@@ -17,7 +17,7 @@ class TestAirCargoProb1(unittest.TestCase):
         self.p1 = air_cargo_p1()
 
     def test_ACP1_num_fluents(self):
-        self.assertEqual(len(self.p1.initial), 12)
+        self.assertEqual(len(self.p1.state_map), 12)
 
     def test_ACP1_num_requirements(self):
         self.assertEqual(len(self.p1.goal),2)
@@ -29,7 +29,7 @@ class TestAirCargoProb2(unittest.TestCase):
         self.p2 = air_cargo_p2()
 
     def test_ACP2_num_fluents(self):
-        self.assertEqual(len(self.p2.initial), 27)
+        self.assertEqual(len(self.p2.state_map), 27)
 
     def test_ACP2_num_requirements(self):
         self.assertEqual(len(self.p2.goal),3)
@@ -41,7 +41,7 @@ class TestAirCargoProb3(unittest.TestCase):
         self.p3 = air_cargo_p3()
 
     def test_ACP3_num_fluents(self):
-        self.assertEqual(len(self.p3.initial), 32)
+        self.assertEqual(len(self.p3.state_map), 32)
 
     def test_ACP3_num_requirements(self):
         self.assertEqual(len(self.p3.goal),4)
@@ -76,6 +76,26 @@ class TestAirCargoMethods(unittest.TestCase):
         self.assertTrue(expr('In(C1, P1)') in fs.pos)
         self.assertTrue(expr('At(C1, SFO)') in fs.neg)
 
+    def test_AC_encoding(self):
+        fs = decode_state(self.p1.initial, self.p1.state_map)
+        self.assertEqual(encode_state(fs, self.p1.state_map), self.p1.initial)
+        self.assertEqual(len(fs.pos), 4)
+        self.assertFalse(self.p1.goal_test(self.p1.initial))
+        goal = FluentState(self.p1.goal, [])
+        self.assertTrue(self.p1.goal_test(encode_state(goal, self.p1.state_map)))
+
+    def test_AC_action_index(self):
+        p2 = air_cargo_p2()
+        state = p2.initial
+        for step in range(30):
+            fs = decode_state(state, p2.state_map)
+            expected = [a for a in p2.actions_list
+                        if all(f in fs.pos for f in a.precond_pos) and
+                        not any(f in fs.pos for f in a.precond_neg)]
+            actions = p2.actions(state)
+            self.assertEqual(actions, expected)
+            state = p2.result(state, actions[step % len(actions)])
+
     def test_h_ignore_preconditions(self):
         n = Node(self.p1.initial)
         self.assertEqual(self.p1.h_ignore_preconditions(n),2)
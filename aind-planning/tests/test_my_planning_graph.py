@@ -1,3 +1,4 @@
+import itertools
 import os
 import sys
 
@@ -7,8 +8,9 @@ import unittest
 from aimacode.utils import expr
 from aimacode.planning import Action
 from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1
 from my_planning_graph import (
-    PlanningGraph, PgNode_a, PgNode_s, mutexify
+    PlanningGraph, PgNode_a, PgNode_s, mutexify, level_cost_graph
 )
 
 
@@ -115,6 +117,30 @@ class TestPlanningGraphMutex(unittest.TestCase):
             "If one parent action can achieve both states, should NOT be inconsistent-support mutex, even if parent actions are themselves mutex")
 
 
+class TestPlanningGraphBitsetMutex(unittest.TestCase):
+    def setUp(self):
+        self.p = air_cargo_p1()
+        self.pg = PlanningGraph(self.p, self.p.initial)
+
+    def test_static_mutexes_shared(self):
+        self.assertIs(PlanningGraph(self.p, self.p.initial).static, self.pg.static)
+
+    def test_level_mutexes(self):
+        pg = self.pg
+        for level in pg.a_levels:
+            for n1, n2 in itertools.permutations(level, 2):
+                expected = (pg.serialize_actions(n1, n2) or
+                            pg.inconsistent_effects_mutex(n1, n2) or
+                            pg.interference_mutex(n1, n2) or
+                            pg.competing_needs_mutex(n1, n2))
+                self.assertEqual(n1.is_mutex(n2), bool(expected))
+        for level in pg.s_levels[1:]:
+            for n1, n2 in itertools.permutations(level, 2):
+                expected = (pg.negation_mutex(n1, n2) or
+                            pg.inconsistent_support_mutex(n1, n2))
+                self.assertEqual(n1.is_mutex(n2), bool(expected))
+
+
 class TestPlanningGraphHeuristics(unittest.TestCase):
     def setUp(self):
         self.p = have_cake()
@@ -123,6 +149,18 @@ class TestPlanningGraphHeuristics(unittest.TestCase):
     def test_levelsum(self):
         self.assertEqual(self.pg.h_levelsum(), 1)
 
+    def test_level_cost_graph(self):
+        self.assertEqual(level_cost_graph(self.p).h_levelsum(self.p.initial), 1)
+        p1 = air_cargo_p1()
+        graph = level_cost_graph(p1)
+        self.assertIs(level_cost_graph(p1), graph)
+        state = p1.initial
+        for step in range(12):
+            self.assertEqual(graph.h_levelsum(state),
+                             PlanningGraph(p1, state).h_levelsum())
+            actions = p1.actions(state)
+            state = p1.result(state, actions[step % len(actions)])
+
 
 if __name__ == '__main__':
     unittest.main()
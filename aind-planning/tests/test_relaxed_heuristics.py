@@ -0,0 +1,49 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+from aimacode.search import Node, astar_search
+import unittest
+from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1
+from relaxed_heuristics import relaxed_task
+
+
+class TestRelaxedHeuristics(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = air_cargo_p1()
+        self.n1 = Node(self.p1.initial)
+
+    def test_h_max(self):
+        self.assertEqual(self.p1.h_max(self.n1), 2)
+
+    def test_h_add(self):
+        self.assertEqual(self.p1.h_add(self.n1), 6)
+
+    def test_h_ff(self):
+        self.assertEqual(self.p1.h_ff(self.n1), 6)
+
+    def test_h_lmcount(self):
+        self.assertEqual(self.p1.h_lmcount(self.n1), 2)
+        node = astar_search(self.p1, self.p1.h_lmcount)
+        self.assertEqual(len(node.solution()), 6)
+        self.assertEqual(self.p1.h_lmcount(node), 0)
+
+    def test_optimal_plan(self):
+        node = astar_search(self.p1, self.p1.h_max)
+        self.assertEqual(len(node.solution()), 6)
+
+    def test_negative_preconditions(self):
+        p = have_cake()
+        task = relaxed_task(p)
+        self.assertIs(relaxed_task(p), task)
+        self.assertEqual(task.h_max(p.initial), 1)
+        self.assertEqual(task.h_ff(p.initial), 1)
+        # with the cake eaten, Bake is needed, which requires ~Have(Cake)
+        eaten = p.result(p.initial, p.actions_list[0])
+        self.assertEqual(task.h_ff(eaten), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
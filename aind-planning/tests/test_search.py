@@ -0,0 +1,81 @@
+import os
+import sys
+parent = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(parent), "aimacode"))
+from aimacode.search import (
+    InstrumentedProblem, Node, NodeQueue, astar_search, breadth_first_search,
+    depth_first_graph_search, uniform_cost_search,
+)
+from aimacode.utils import FIFOQueue
+import unittest
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2
+
+
+class TestBestFirstGraphSearch(unittest.TestCase):
+
+    def test_uniform_cost_search(self):
+        ip = InstrumentedProblem(air_cargo_p1())
+        node = uniform_cost_search(ip)
+        self.assertEqual(len(node.solution()), 6)
+        self.assertEqual((ip.succs, ip.goal_tests, ip.states), (55, 57, 224))
+        self.assertEqual(ip.stale, 0)
+
+    def test_stale_nodes(self):
+        p2 = air_cargo_p2()
+        ip = InstrumentedProblem(p2)
+        node = astar_search(ip, p2.h_ignore_preconditions)
+        # cheaper paths to queued states leave stale entries in the frontier
+        self.assertEqual(len(node.solution()), 9)
+        self.assertGreater(ip.stale, 0)
+        self.assertEqual(node.path_cost, 9)
+
+
+class TestGraphSearchRegression(unittest.TestCase):
+    """Expansions, goal tests, new nodes and plan lengths of the uninformed
+    searches, which must not change with the frontier implementation."""
+
+    def check(self, problem, search, counts, plan_length):
+        ip = InstrumentedProblem(problem)
+        node = search(ip)
+        self.assertEqual((ip.succs, ip.goal_tests, ip.states), counts)
+        self.assertEqual(len(node.solution()), plan_length)
+        self.assertTrue(problem.goal_test(node.state))
+        return node
+
+    def test_p1(self):
+        node = self.check(air_cargo_p1(), breadth_first_search, (43, 56, 180), 6)
+        self.assertEqual([str(action) for action in node.solution()],
+                         ['Load(C2, P2, JFK)', 'Load(C1, P1, SFO)',
+                          'Fly(P2, JFK, SFO)', 'Unload(C2, P2, SFO)',
+                          'Fly(P1, SFO, JFK)', 'Unload(C1, P1, JFK)'])
+        self.check(air_cargo_p1(), depth_first_graph_search, (12, 13, 48), 12)
+        self.check(air_cargo_p1(), uniform_cost_search, (55, 57, 224), 6)
+
+    def test_p2(self):
+        self.check(air_cargo_p2(), breadth_first_search, (3343, 4609, 30509), 9)
+        self.check(air_cargo_p2(), depth_first_graph_search, (582, 583, 5211), 575)
+
+
+class TestFrontiers(unittest.TestCase):
+
+    def test_node_queue(self):
+        for lifo, expected in ((False, [1, 2, 3, 1]), (True, [1, 3, 2, 1])):
+            frontier = NodeQueue(lifo)
+            frontier.extend(Node(state) for state in (1, 2, 3, 1))
+            self.assertIn(Node(1), frontier)
+            self.assertNotIn(Node(4), frontier)
+            self.assertEqual(frontier.pop().state, expected[0])
+            self.assertIn(Node(1), frontier)
+            self.assertEqual([frontier.pop().state for _ in range(3)], expected[1:])
+            self.assertNotIn(Node(1), frontier)
+            self.assertEqual(len(frontier), 0)
+
+    def test_fifo_queue_extend(self):
+        frontier = FIFOQueue()
+        frontier.extend(item for item in 'abc')
+        self.assertIn('b', frontier)
+        self.assertEqual([frontier.pop() for _ in range(3)], ['a', 'b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()